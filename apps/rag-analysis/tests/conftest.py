@@ -16,11 +16,51 @@ _src_dir = _tests_dir.parent / "src"
 if str(_src_dir) not in sys.path:
     sys.path.insert(0, str(_src_dir))
 
+import httpx
+
 from analysis.models.agents import AnalysisRequestVO, TimeHorizon, RiskAppetite
 from analysis.services.llm_client import LLMClient
 from analysis.services.sentiment_client import SentimentAPIClient
 
 
+# 离线测试使用的固定 LLM 返回
+CANNED_LLM_COMPLETION: Dict[str, Any] = {
+    "one_liner": "AI技术突破",
+    "meme_potential": 0.5,
+    "influencers_take": ["中性"],
+    "lifecycle_days": 3,
+    "priced_in": False,
+}
+
+
+@pytest.fixture(autouse=True)
+def offline_backend(monkeypatch):
+    """
+    离线后端：拦截 httpx 异步请求与 LLM 调用，返回确定性的固定响应，
+    保证测试过程中不会产生任何外部网络 I/O。补丁随每个测试结束自动撤销。
+    """
+    async def fake_request(self, method, url, *args, **kwargs):
+        request = httpx.Request(method, url)
+        return httpx.Response(
+            200,
+            json={"choices": [{"message": {"content": "{}"}}], "data": {}},
+            request=request,
+        )
+
+    async def fake_post(self, url, *args, **kwargs):
+        return await fake_request(self, "POST", url)
+
+    async def fake_get(self, url, *args, **kwargs):
+        return await fake_request(self, "GET", url)
+
+    async def fake_structured_json(self, system_prompt, user_prompt, temperature=0.2, max_tokens=None):
+        return dict(CANNED_LLM_COMPLETION)
+
+    monkeypatch.setattr(httpx.AsyncClient, "post", fake_post)
+    monkeypatch.setattr(httpx.AsyncClient, "get", fake_get)
+    monkeypatch.setattr(LLMClient, "structured_json", fake_structured_json)
+
+
 @pytest.fixture
 def sample_analysis_request():
     """示例分析请求"""
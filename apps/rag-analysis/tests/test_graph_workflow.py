@@ -15,6 +15,7 @@ from analysis.models.agents import (
     QuantImpact,
     ContrarianRisk,
     SecondOrderEffects,
+    SynthesizedDecision,
 )
 from analysis.models.enhanced_agents import (
     DataIntelligenceReport,
@@ -23,83 +24,100 @@ from analysis.models.enhanced_agents import (
 )
 
 
+# Stub payloads are built once at import time and shared by every stub call
+_NF = NarrativeFinding(
+    one_liner="AI技术突破",
+    meme_potential=0.6,
+    influencers_take=["正面传播", "关注度高"],
+    lifecycle_days=5,
+    priced_in=False,
+)
+
+_QI = QuantImpact(
+    pnl_line="P&L",
+    magnitude="tens_of_millions",
+    kpi_shifts_pct={"revenue_pct": 1.0},
+    recurring=True,
+)
+
+_CR = ContrarianRisk(
+    red_flags=["验证样本有限"],
+    data_validity_risks=["渠道一致性"],
+    overreaction_signals=["社媒热度偏高"],
+)
+
+_SO = SecondOrderEffects(
+    competitor_moves=["促销跟进"],
+    regulatory_watchpoints=["关注消费者权益"],
+    supply_chain_shift=["上游议价上升"],
+    consumer_behavior_change=["短期转化提升"],
+)
+
+_DECISION = SynthesizedDecision(
+    action="hold",
+    confidence=0.7,
+    rationale="stub",
+    key_drivers=["meme_potential"],
+    risk_checks=[],
+)
+
+_DATA_INTEL = DataIntelligenceReport(
+    market_snapshot={"overall_sentiment": {"positive": 0.5}},
+    sentiment_indicators={},
+    key_financial_metrics={},
+    market_anomalies=[],
+    data_quality_score=0.8,
+    data_sources_reliability={"sentiment_api": 0.8},
+)
+
+_RISK = RiskControlAssessment(
+    overall_risk_score=0.3,
+    market_risk_metrics={},
+    liquidity_risk_assessment={},
+    concentration_risk_analysis={},
+    regulatory_compliance_check={},
+    decision_coherence_risk={},
+    risk_control_recommendations=["正常监控"],
+    stress_test_scenarios=[],
+    risk_limits_breach_alerts=[],
+    assessment_timestamp="2025-01-01T00:00:00",
+)
+
+_MACRO = MacroStrategicView(
+    macro_economic_backdrop={},
+    policy_regime_analysis={},
+    cross_market_correlations={},
+    secular_trend_assessment={},
+    strategic_market_outlook={"market_regime": "neutral"},
+)
+
+
 @pytest.mark.asyncio
 async def test_graph_workflow_runs_with_stubs(monkeypatch):
     # Stub all agent analyses to avoid external I/O
     async def nf_analyze(self, req):
-        return NarrativeFinding(
-            one_liner="AI技术突破",
-            meme_potential=0.6,
-            influencers_take=["正面传播", "关注度高"],
-            lifecycle_days=5,
-            priced_in=False,
-        )
+        return _NF
 
     async def qi_analyze(self, req):
-        return QuantImpact(
-            pnl_line="P&L",
-            magnitude="tens_of_millions",
-            kpi_shifts_pct={"revenue_pct": 1.0},
-            recurring=True,
-        )
+        return _QI
 
     async def cr_analyze(self, req):
-        return ContrarianRisk(
-            red_flags=["验证样本有限"],
-            data_validity_risks=["渠道一致性"],
-            overreaction_signals=["社媒热度偏高"],
-        )
+        return _CR
 
     async def so_analyze(self, req):
-        return SecondOrderEffects(
-            competitor_moves=["促销跟进"],
-            regulatory_watchpoints=["关注消费者权益"],
-            supply_chain_shift=["上游议价上升"],
-            consumer_behavior_change=["短期转化提升"],
-        )
+        return _SO
 
     async def synthesize_stub(self, findings):
-        from analysis.models.agents import SynthesizedDecision
-        return SynthesizedDecision(
-            action="hold",
-            confidence=0.7,
-            rationale="stub",
-            key_drivers=["meme_potential"],
-            risk_checks=[],
-        )
+        return _DECISION
 
     async def data_intel_stub(self, req):
-        return DataIntelligenceReport(
-            market_snapshot={"overall_sentiment": {"positive": 0.5}},
-            sentiment_indicators={},
-            key_financial_metrics={},
-            market_anomalies=[],
-            data_quality_score=0.8,
-            data_sources_reliability={"sentiment_api": 0.8},
-        )
+        return _DATA_INTEL
 
     async def risk_stub(self, req, findings=None):
-        return RiskControlAssessment(
-            overall_risk_score=0.3,
-            market_risk_metrics={},
-            liquidity_risk_assessment={},
-            concentration_risk_analysis={},
-            regulatory_compliance_check={},
-            decision_coherence_risk={},
-            risk_control_recommendations=["正常监控"],
-            stress_test_scenarios=[],
-            risk_limits_breach_alerts=[],
-            assessment_timestamp="2025-01-01T00:00:00",
-        )
+        return _RISK
 
     async def macro_stub(self, req):
-        return MacroStrategicView(
-            macro_economic_backdrop={},
-            policy_regime_analysis={},
-            cross_market_correlations={},
-            secular_trend_assessment={},
-            strategic_market_outlook={"market_regime": "neutral"},
-        )
+        return _MACRO
 
     monkeypatch.setattr(
         "analysis.services.agents.roles.NarrativeArbitrageurAgent.analyze", nf_analyze
@@ -10,6 +10,7 @@ from pathlib import Path
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from contextlib import asynccontextmanager
 
 # 确保本服务的 src 目录优先，避免与项目根级同名包冲突
@@ -20,24 +21,26 @@ if str(_SRC_DIR) not in sys.path:
 from stock.core.config import settings
 from stock.core.database import db_manager
 from stock.core.logging import logger
-from stock.api.stock_api import router as stock_router
+from stock.api.stock_api import router as stock_router, health_router
 from stock.api.rag_api import router as rag_router
 from stock.services.scheduler import StockRefreshScheduler
+from stock.services.stock_service import StockService
+from stock.services.rag_integration import RAGIntegrationAdapter
 from stock.models.base import SchedulerConfig
 
-# 全局调度器实例
-scheduler = None
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """应用生命周期管理"""
-    global scheduler
+    # 服务、调度器和 RAG 适配器实例挂载在 app.state 上，供路由依赖注入使用
+    app.state.stock_service = StockService()
+    app.state.scheduler = None
+    app.state.rag_adapter = RAGIntegrationAdapter()
     
     # 启动时
     logger.info("🚀 Stock Agent 服务启动中...")
     
     # 连接数据库
-    if db_manager.connect():
+    if await db_manager.connect():
         logger.info("✅ 数据库连接成功")
     else:
         logger.error("❌ 数据库连接失败")
@@ -47,10 +50,10 @@ async def lifespan(app: FastAPI):
         scheduler_config = SchedulerConfig()
         scheduler = StockRefreshScheduler(scheduler_config)
         await scheduler.start()
+        app.state.scheduler = scheduler
         logger.info("✅ 股票刷新调度器启动成功")
     except Exception as e:
         logger.error(f"❌ 调度器启动失败: {e}")
-        scheduler = None
     
     logger.info(f"✅ Stock Agent 服务已启动 - {settings.api.host}:{settings.api.port}")
     
@@ -60,13 +63,17 @@ async def lifespan(app: FastAPI):
     logger.info("🛑 Stock Agent 服务关闭中...")
     
     # 停止调度器
-    if scheduler:
+    if app.state.scheduler:
         try:
-            await scheduler.stop()
+            await app.state.scheduler.stop()
             logger.info("✅ 调度器已停止")
         except Exception as e:
             logger.error(f"❌ 调度器停止失败: {e}")
     
+    # 关闭 HTTP 连接池
+    await app.state.rag_adapter.aclose()
+    await app.state.stock_service.aclose()
+    
     db_manager.disconnect()
     logger.info("✅ Stock Agent 服务已关闭")
 
@@ -90,7 +97,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 添加 GZip 压缩中间件（仅压缩大于 1KB 的响应，如行业分析、股票列表等大体积 JSON）
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # 注册路由
+app.include_router(health_router)
 app.include_router(stock_router)
 app.include_router(rag_router)
 
@@ -128,10 +139,19 @@ async def meta():
 
 
 if __name__ == "__main__":
-    # 运行服务
+    # 运行服务（多进程或热重载时 uvicorn 要求以导入字符串形式传入应用）
+    if settings.api.debug:
+        workers = 1
+    else:
+        workers = settings.api.workers or os.cpu_count() or 2
+    
     uvicorn.run(
-        app,
+        "main:app",
         host=settings.api.host,
         port=settings.api.port,
+        workers=workers,
+        # uvloop 不支持 Windows，此时退回默认 asyncio 事件循环
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
         reload=settings.api.debug
     )
@@ -0,0 +1,34 @@
+"""
+API 异常处理工具
+"""
+
+from functools import wraps
+from typing import Any, Awaitable, Callable
+
+from fastapi import HTTPException
+from loguru import logger
+
+
+def handle_errors(message: str):
+    """
+    装饰器：统一处理接口异常
+
+    HTTPException 原样抛出；其他异常记录日志后转换为 500 错误。
+    message 支持使用接口参数格式化，例如 "刷新股票 {stock_code} 失败"。
+
+    Args:
+        message: 错误信息前缀
+    """
+    def decorator(func: Callable[..., Awaitable[Any]]):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await func(*args, **kwargs)
+            except HTTPException:
+                raise
+            except Exception as e:
+                detail = f"{message.format(**kwargs)}: {str(e)}"
+                logger.opt(exception=e).error(detail)
+                raise HTTPException(status_code=500, detail=detail) from e
+        return wrapper
+    return decorator
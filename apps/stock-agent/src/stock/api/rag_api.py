@@ -3,13 +3,18 @@ RAG-Analysis 系统集成 API
 """
 
 from typing import List, Optional
-from fastapi import APIRouter, Query, HTTPException, Depends
+from fastapi import APIRouter, Query, HTTPException, Depends, Request
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 
 from ..services.rag_integration import RAGIntegrationAdapter
-from ..core.database import db_manager
+from .errors import handle_errors
 
-router = APIRouter(prefix="/api/v1/rag", tags=["RAG集成"])
+router = APIRouter(
+    prefix="/api/v1/rag",
+    tags=["RAG集成"],
+    default_response_class=ORJSONResponse
+)
 
 
 class MarketContextRequest(BaseModel):
@@ -30,11 +35,16 @@ class ComparativeAnalysisRequest(BaseModel):
 
 
 # 依赖注入
-def get_rag_adapter() -> RAGIntegrationAdapter:
-    return RAGIntegrationAdapter()
+def get_rag_adapter(request: Request) -> RAGIntegrationAdapter:
+    """获取应用启动时创建的适配器实例（共享 HTTP 连接池）"""
+    adapter = getattr(request.app.state, "rag_adapter", None)
+    if adapter is None:
+        raise HTTPException(status_code=503, detail="RAG 集成适配器未就绪")
+    return adapter
 
 
 @router.post("/market-context", summary="获取市场上下文")
+@handle_errors("获取市场上下文失败")
 async def get_market_context(
     request: MarketContextRequest,
     adapter: RAGIntegrationAdapter = Depends(get_rag_adapter)
@@ -49,27 +59,20 @@ async def get_market_context(
     - long: 长期(1-3月)
     - extended: 扩展期(3月以上)
     """
-    try:
-        # 确保数据库连接
-        if not db_manager.client:
-            db_manager.connect()
-            
-        context = await adapter.provide_market_context(
-            request.symbols,
-            request.time_horizon
-        )
-        
-        return {
-            "success": True,
-            "data": context,
-            "message": f"获取 {len(request.symbols)} 只股票的市场上下文成功"
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取市场上下文失败: {str(e)}")
+    context = await adapter.provide_market_context(
+        request.symbols,
+        request.time_horizon
+    )
+    
+    return {
+        "success": True,
+        "data": context,
+        "message": f"获取 {len(request.symbols)} 只股票的市场上下文成功"
+    }
 
 
 @router.post("/sector-analysis", summary="获取行业分析")
+@handle_errors("获取行业分析失败")
 async def get_sector_analysis(
     request: SectorAnalysisRequest,
     adapter: RAGIntegrationAdapter = Depends(get_rag_adapter)
@@ -77,32 +80,23 @@ async def get_sector_analysis(
     """
     获取指定行业的分析数据
     """
-    try:
-        # 确保数据库连接
-        if not db_manager.client:
-            db_manager.connect()
-            
-        analysis = await adapter.get_sector_analysis(
-            request.industry,
-            request.limit
-        )
-        
-        if "error" in analysis:
-            raise HTTPException(status_code=400, detail=analysis["error"])
-        
-        return {
-            "success": True,
-            "data": analysis,
-            "message": f"获取 {request.industry} 行业分析成功"
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取行业分析失败: {str(e)}")
+    analysis = await adapter.get_sector_analysis(
+        request.industry,
+        request.limit
+    )
+    
+    if "error" in analysis:
+        raise HTTPException(status_code=400, detail=analysis["error"])
+    
+    return {
+        "success": True,
+        "data": analysis,
+        "message": f"获取 {request.industry} 行业分析成功"
+    }
 
 
 @router.post("/comparative-analysis", summary="获取对比分析")
+@handle_errors("获取对比分析失败")
 async def get_comparative_analysis(
     request: ComparativeAnalysisRequest,
     adapter: RAGIntegrationAdapter = Depends(get_rag_adapter)
@@ -110,29 +104,20 @@ async def get_comparative_analysis(
     """
     获取多只股票的对比分析数据
     """
-    try:
-        # 确保数据库连接
-        if not db_manager.client:
-            db_manager.connect()
-            
-        analysis = await adapter.get_comparative_analysis(request.symbols)
-        
-        if "error" in analysis:
-            raise HTTPException(status_code=400, detail=analysis["error"])
-        
-        return {
-            "success": True,
-            "data": analysis,
-            "message": f"获取 {len(request.symbols)} 只股票的对比分析成功"
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取对比分析失败: {str(e)}")
+    analysis = await adapter.get_comparative_analysis(request.symbols)
+    
+    if "error" in analysis:
+        raise HTTPException(status_code=400, detail=analysis["error"])
+    
+    return {
+        "success": True,
+        "data": analysis,
+        "message": f"获取 {len(request.symbols)} 只股票的对比分析成功"
+    }
 
 
 @router.get("/market-context/{symbol}", summary="获取单只股票上下文")
+@handle_errors("获取股票上下文失败")
 async def get_single_stock_context(
     symbol: str,
     time_horizon: str = Query("medium", description="时间范围"),
@@ -141,24 +126,17 @@ async def get_single_stock_context(
     """
     获取单只股票的市场上下文数据
     """
-    try:
-        # 确保数据库连接
-        if not db_manager.client:
-            db_manager.connect()
-            
-        context = await adapter.provide_market_context([symbol], time_horizon)
-        
-        return {
-            "success": True,
-            "data": context,
-            "message": f"获取股票 {symbol} 的市场上下文成功"
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取股票上下文失败: {str(e)}")
+    context = await adapter.provide_single_market_context(symbol, time_horizon)
+    
+    return {
+        "success": True,
+        "data": context,
+        "message": f"获取股票 {symbol} 的市场上下文成功"
+    }
 
 
 @router.get("/sectors/{industry}/summary", summary="获取行业摘要")
+@handle_errors("获取行业摘要失败")
 async def get_industry_summary(
     industry: str,
     limit: int = Query(10, description="返回股票数量"),
@@ -167,34 +145,24 @@ async def get_industry_summary(
     """
     获取行业摘要信息（简化版）
     """
-    try:
-        # 确保数据库连接
-        if not db_manager.client:
-            db_manager.connect()
-            
-        analysis = await adapter.get_sector_analysis(industry, limit)
-        
-        if "error" in analysis:
-            raise HTTPException(status_code=400, detail=analysis["error"])
-        
-        # 返回摘要信息
-        summary = {
-            "industry": analysis["industry"],
-            "total_companies": analysis["total_companies"],
-            "sector_metrics": analysis["sector_metrics"],
-            "top_companies": analysis["companies"][:5]  # 只返回前5家公司
-        }
-        
-        return {
-            "success": True,
-            "data": summary,
-            "message": f"获取 {industry} 行业摘要成功"
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取行业摘要失败: {str(e)}")
+    analysis = await adapter.get_sector_analysis(industry, limit)
+    
+    if "error" in analysis:
+        raise HTTPException(status_code=400, detail=analysis["error"])
+    
+    # 返回摘要信息
+    summary = {
+        "industry": analysis["industry"],
+        "total_companies": analysis["total_companies"],
+        "sector_metrics": analysis["sector_metrics"],
+        "top_companies": analysis["companies"][:5]  # 只返回前5家公司
+    }
+    
+    return {
+        "success": True,
+        "data": summary,
+        "message": f"获取 {industry} 行业摘要成功"
+    }
 
 
 @router.get("/integration/test", summary="RAG集成测试")
@@ -205,10 +173,6 @@ async def test_rag_integration(
     测试 RAG-Analysis 系统集成
     """
     try:
-        # 确保数据库连接
-        if not db_manager.client:
-            db_manager.connect()
-            
         # 使用示例数据进行测试
         test_symbols = ["000001", "600036", "000002"]
         
@@ -2,37 +2,128 @@
 股票数据 API 路由
 """
 
-from typing import List, Optional
-from fastapi import APIRouter, Query, HTTPException, Depends
+import asyncio
+import hashlib
+import re
+import time
+import orjson
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from fastapi import APIRouter, Query, Path, HTTPException, Depends, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
 from datetime import datetime
-from loguru import logger
 
 from ..models.base import StockQuery, BatchProcessResult, RefreshTask
-from ..services.stock_service import StockService
+from ..services.stock_service import StockService, stock_list_cache
 from ..services.scheduler import StockRefreshScheduler
 from ..core.database import db_manager
+from .errors import handle_errors
 
-router = APIRouter(prefix="/api/v1/stocks", tags=["股票数据"])
+# A股股票代码格式（6位数字），在路由层校验，非法代码不会访问数据库
+STOCK_CODE_PATTERN = r"^\d{6}$"
+_STOCK_CODE_RE = re.compile(STOCK_CODE_PATTERN)
 
 # 依赖注入
-def get_stock_service() -> StockService:
-    return StockService()
-
-def get_scheduler() -> StockRefreshScheduler:
-    """获取调度器实例"""
-    # 导入全局调度器实例
-    import sys
-    main_module = sys.modules.get('main')
-    if main_module and hasattr(main_module, 'scheduler') and main_module.scheduler:
-        return main_module.scheduler
+async def require_db():
+    """数据库未就绪时直接返回 503，连接由应用启动时建立"""
+    if db_manager.db is None:
+        raise HTTPException(status_code=503, detail="数据库未就绪")
+
+
+router = APIRouter(
+    prefix="/api/v1/stocks",
+    tags=["股票数据"],
+    default_response_class=ORJSONResponse,
+    dependencies=[Depends(require_db)]
+)
+
+# 健康检查不依赖数据库就绪，单独注册（需先于 router 注册，避免被 /{stock_code} 匹配）
+health_router = APIRouter(
+    prefix="/api/v1/stocks",
+    tags=["股票数据"],
+    default_response_class=ORJSONResponse
+)
+
+# 健康检查时间戳缓存 (生成时间, ISO 字符串)，1 秒内复用
+_health_ts: Tuple[float, str] = (0.0, "")
+
+
+def _health_timestamp() -> str:
+    """获取健康检查时间戳（秒级缓存，避免高频探测时重复格式化）"""
+    global _health_ts
+    now = time.time()
+    if now - _health_ts[0] >= 1.0:
+        _health_ts = (now, datetime.fromtimestamp(now).isoformat())
+    return _health_ts[1]
+
+
+# 代码/行业列表缓存：由 StockService 在股票数据写入后清空
+_list_cache = stock_list_cache
+# 每个正在加载的缓存键一把锁，缓存失效时只有一个请求回源加载
+# 锁在无人持有/等待时移除，避免按任意行业名请求时锁表无限增长
+_list_cache_locks: Dict[str, asyncio.Lock] = {}
+# 缓存键 -> 持有或等待该锁的请求数
+_list_cache_lock_users: Dict[str, int] = {}
+
+
+async def _get_cached_list(key: str, loader: Callable[[], Awaitable[List[Any]]]) -> Tuple[List[Any], str]:
+    """获取缓存的列表数据及其 ETag，未命中时调用 loader 加载（空结果不缓存）"""
+    entry = _list_cache.get(key)
+    if entry is not None:
+        return entry
     
-    # 如果全局实例不可用，创建临时实例
-    from ..models.base import SchedulerConfig
-    config = SchedulerConfig()
-    return StockRefreshScheduler(config)
+    lock = _list_cache_locks.get(key)
+    if lock is None:
+        lock = _list_cache_locks[key] = asyncio.Lock()
+    _list_cache_lock_users[key] = _list_cache_lock_users.get(key, 0) + 1
+    try:
+        async with lock:
+            # 等锁期间可能已由其他请求加载完成
+            entry = _list_cache.get(key)
+            if entry is None:
+                data = await loader()
+                digest = hashlib.blake2b(
+                    orjson.dumps(data, default=str),
+                    digest_size=8
+                ).hexdigest()
+                entry = (data, f'"{digest}"')
+                if data:
+                    _list_cache.set(key, entry)
+    finally:
+        remaining = _list_cache_lock_users[key] - 1
+        if remaining:
+            _list_cache_lock_users[key] = remaining
+        else:
+            del _list_cache_lock_users[key]
+            del _list_cache_locks[key]
+    return entry
+
+
+def _cache_headers(etag: str) -> dict:
+    """列表接口的 HTTP 缓存头"""
+    # 客户端每次用 ETag 重新验证：数据刷新后服务端缓存即失效，未变化时只返回 304
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+class BatchStockRequest(BaseModel):
+    """批量获取股票详情请求模型"""
+    codes: List[str] = Field(..., max_length=500, description="股票代码列表")
+
+
+def get_stock_service(request: Request) -> StockService:
+    """获取应用启动时创建的股票服务实例（共享HTTP连接池）"""
+    return request.app.state.stock_service
+
+def get_scheduler(request: Request) -> StockRefreshScheduler:
+    """获取应用启动时创建的调度器实例"""
+    scheduler = getattr(request.app.state, "scheduler", None)
+    if scheduler is None:
+        raise HTTPException(status_code=503, detail="调度器未就绪")
+    return scheduler
 
 
 @router.get("/", summary="查询股票列表")
+@handle_errors("查询股票数据失败")
 async def query_stocks(
     codes: Optional[List[str]] = Query(None, description="股票代码列表"),
     industries: Optional[List[str]] = Query(None, description="行业列表"),
@@ -42,290 +133,341 @@ async def query_stocks(
     max_pe: Optional[float] = Query(None, description="最大市盈率"),
     start_date: Optional[datetime] = Query(None, description="开始日期"),
     end_date: Optional[datetime] = Query(None, description="结束日期"),
+    fields: Optional[List[str]] = Query(None, description="仅返回指定字段，如 stock_code、basic_info"),
     service: StockService = Depends(get_stock_service)
 ):
     """
     根据条件查询股票数据
+    
+    列表场景可通过 fields 只返回需要的字段，避免传输完整的K线和股东数据
+    """
+    query = StockQuery(
+        codes=codes,
+        industries=industries,
+        min_market_cap=min_market_cap,
+        max_market_cap=max_market_cap,
+        min_pe=min_pe,
+        max_pe=max_pe,
+        start_date=start_date,
+        end_date=end_date
+    )
+    
+    projection = dict.fromkeys(fields, 1) if fields else None
+    results = await service.query_stocks(query, projection)
+    
+    return {
+        "success": True,
+        "data": results,
+        "total": len(results),
+        "message": f"查询到 {len(results)} 只股票"
+    }
+
+
+@router.get("/stream", summary="流式查询股票列表")
+async def stream_stocks(
+    codes: Optional[List[str]] = Query(None, description="股票代码列表"),
+    industries: Optional[List[str]] = Query(None, description="行业列表"),
+    min_market_cap: Optional[float] = Query(None, description="最小市值(亿元)"),
+    max_market_cap: Optional[float] = Query(None, description="最大市值(亿元)"),
+    min_pe: Optional[float] = Query(None, description="最小市盈率"),
+    max_pe: Optional[float] = Query(None, description="最大市盈率"),
+    start_date: Optional[datetime] = Query(None, description="开始日期"),
+    end_date: Optional[datetime] = Query(None, description="结束日期"),
+    fields: Optional[List[str]] = Query(None, description="仅返回指定字段，如 stock_code、basic_info"),
+    service: StockService = Depends(get_stock_service)
+):
+    """
+    按条件流式返回股票数据（NDJSON，每行一只股票）
+    
+    查询条件与 GET / 相同；结果集较大时客户端可边接收边处理，服务端无需在内存中组装完整列表
+    """
+    query = StockQuery(
+        codes=codes,
+        industries=industries,
+        min_market_cap=min_market_cap,
+        max_market_cap=max_market_cap,
+        min_pe=min_pe,
+        max_pe=max_pe,
+        start_date=start_date,
+        end_date=end_date
+    )
+    projection = dict.fromkeys(fields, 1) if fields else None
+    
+    async def ndjson_lines():
+        async for doc in service.iter_stocks(query, projection):
+            yield orjson.dumps(doc, default=str) + b"\n"
+    
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+
+@health_router.get("/health", summary="健康检查")
+async def health_check():
+    """
+    检查服务及数据库连接状态
     """
     try:
-        # 确保数据库连接
-        if not db_manager.client:
-            db_manager.connect()
-            
-        query = StockQuery(
-            codes=codes,
-            industries=industries,
-            min_market_cap=min_market_cap,
-            max_market_cap=max_market_cap,
-            min_pe=min_pe,
-            max_pe=max_pe,
-            start_date=start_date,
-            end_date=end_date
-        )
+        if db_manager.client is None:
+            raise RuntimeError("数据库未连接")
         
-        results = await service.query_stocks(query)
+        await db_manager.client.admin.command('ping')
         
         return {
-            "success": True,
-            "data": results,
-            "total": len(results),
-            "message": f"查询到 {len(results)} 只股票"
+            "status": "healthy",
+            "service": "stock-agent",
+            "database": "connected",
+            "timestamp": _health_timestamp()
         }
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"查询股票数据失败: {str(e)}")
+        return {
+            "status": "unhealthy",
+            "service": "stock-agent",
+            "database": "disconnected",
+            "error": str(e),
+            "timestamp": _health_timestamp()
+        }
 
 
 @router.get("/{stock_code}", summary="获取单只股票详情")
+@handle_errors("获取股票数据失败")
 async def get_stock_detail(
-    stock_code: str,
+    stock_code: str = Path(..., pattern=STOCK_CODE_PATTERN, description="股票代码"),
     service: StockService = Depends(get_stock_service)
 ):
     """
     根据股票代码获取详细信息
     """
-    try:
-        # 确保数据库连接
-        if not db_manager.client:
-            db_manager.connect()
-            
-        result = await service.get_stock_by_code(stock_code)
-        
-        if not result:
-            raise HTTPException(status_code=404, detail=f"未找到股票 {stock_code} 的数据")
-        
-        return {
-            "success": True,
-            "data": result,
-            "message": f"获取股票 {stock_code} 数据成功"
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取股票数据失败: {str(e)}")
+    result = await service.get_stock_by_code(stock_code)
+    
+    if not result:
+        raise HTTPException(status_code=404, detail=f"未找到股票 {stock_code} 的数据")
+    
+    return {
+        "success": True,
+        "data": result,
+        "message": f"获取股票 {stock_code} 数据成功"
+    }
+
+
+@router.post("/batch", summary="批量获取股票详情")
+@handle_errors("批量获取股票数据失败")
+async def get_stocks_batch(
+    request: BatchStockRequest,
+    service: StockService = Depends(get_stock_service)
+):
+    """
+    一次请求获取多只股票的详细信息，返回 {股票代码: 数据}
+    
+    格式非法或数据库中不存在的代码不包含在结果中
+    """
+    codes = [code for code in dict.fromkeys(request.codes) if _STOCK_CODE_RE.match(code)]
+    results = await service.get_stocks_by_codes(codes)
+    
+    return {
+        "success": True,
+        "data": results,
+        "total": len(results),
+        "message": f"获取到 {len(results)}/{len(request.codes)} 只股票数据"
+    }
 
 
 @router.get("/codes/all", summary="获取所有股票代码")
+@handle_errors("获取股票代码失败")
 async def get_all_stock_codes(
+    request: Request,
+    response: Response,
     service: StockService = Depends(get_stock_service)
 ):
     """
     获取所有A股股票代码列表
     """
-    try:
-        codes = await service.get_all_stock_codes()
-        
-        return {
-            "success": True,
-            "data": codes,
-            "total": len(codes),
-            "message": f"获取到 {len(codes)} 个股票代码"
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取股票代码失败: {str(e)}")
+    codes, etag = await _get_cached_list("codes", service.get_all_stock_codes)
+    
+    headers = _cache_headers(etag)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    
+    return {
+        "success": True,
+        "data": codes,
+        "total": len(codes),
+        "message": f"获取到 {len(codes)} 个股票代码"
+    }
 
 
 @router.get("/industries/all", summary="获取所有行业")
+@handle_errors("获取行业列表失败")
 async def get_all_industries(
+    request: Request,
+    response: Response,
     service: StockService = Depends(get_stock_service)
 ):
     """
     获取所有行业列表
     """
-    try:
-        # 确保数据库连接
-        if not db_manager.client:
-            db_manager.connect()
-            
-        industries = await service.get_industries()
-        
-        return {
-            "success": True,
-            "data": industries,
-            "total": len(industries),
-            "message": f"获取到 {len(industries)} 个行业"
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取行业列表失败: {str(e)}")
+    industries, etag = await _get_cached_list("industries", service.get_industries)
+    
+    headers = _cache_headers(etag)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    
+    return {
+        "success": True,
+        "data": industries,
+        "total": len(industries),
+        "message": f"获取到 {len(industries)} 个行业"
+    }
 
 
 @router.get("/industry/{industry}/codes", summary="获取行业股票代码")
+@handle_errors("获取行业股票代码失败")
 async def get_industry_stock_codes(
     industry: str,
+    request: Request,
+    response: Response,
     service: StockService = Depends(get_stock_service)
 ):
     """
     获取指定行业的所有股票代码
     """
-    try:
-        # 确保数据库连接
-        if not db_manager.client:
-            db_manager.connect()
-            
-        codes = await service.get_stocks_by_industry(industry)
-        
-        return {
-            "success": True,
-            "data": codes,
-            "total": len(codes),
-            "industry": industry,
-            "message": f"{industry} 行业有 {len(codes)} 只股票"
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取行业股票代码失败: {str(e)}")
+    codes, etag = await _get_cached_list(
+        f"industry:{industry}",
+        lambda: service.get_stocks_by_industry(industry)
+    )
+    
+    headers = _cache_headers(etag)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    
+    return {
+        "success": True,
+        "data": codes,
+        "total": len(codes),
+        "industry": industry,
+        "message": f"{industry} 行业有 {len(codes)} 只股票"
+    }
 
 
 @router.post("/fetch/single", summary="获取单只股票数据")
+@handle_errors("获取股票数据失败")
 async def fetch_single_stock(
-    stock_code: str,
+    stock_code: str = Query(..., pattern=STOCK_CODE_PATTERN, description="股票代码"),
     service: StockService = Depends(get_stock_service)
 ):
     """
     获取并保存单只股票的完整数据
     """
-    try:
-        # 确保数据库连接
-        if not db_manager.client:
-            db_manager.connect()
-            
-        success = await service.fetch_and_save_stock(stock_code)
-        
-        if success:
-            return {
-                "success": True,
-                "data": {"stock_code": stock_code},
-                "message": f"股票 {stock_code} 数据获取成功"
-            }
-        else:
-            raise HTTPException(status_code=500, detail=f"股票 {stock_code} 数据获取失败")
-            
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取股票数据失败: {str(e)}")
+    success = await service.fetch_and_save_stock(stock_code)
+    
+    if success:
+        return {
+            "success": True,
+            "data": {"stock_code": stock_code},
+            "message": f"股票 {stock_code} 数据获取成功"
+        }
+    else:
+        raise HTTPException(status_code=500, detail=f"股票 {stock_code} 数据获取失败")
 
 
 @router.post("/fetch/batch", summary="批量获取股票数据")
+@handle_errors("批量获取股票数据失败")
 async def fetch_batch_stocks(
     stock_codes: List[str],
-    batch_size: int = Query(50, description="批处理大小"),
+    batch_size: int = Query(50, ge=1, description="批处理大小"),
+    max_concurrency: Optional[int] = Query(None, ge=1, le=64, description="同时抓取的股票数上限，默认取配置"),
     service: StockService = Depends(get_stock_service)
 ):
     """
     批量获取并保存股票数据
+    
+    重复代码只处理一次，格式非法的代码直接跳过并在 invalid_codes 中返回
     """
-    try:
-        # 确保数据库连接
-        if not db_manager.client:
-            db_manager.connect()
-            
-        result = await service.batch_fetch_stocks(stock_codes, batch_size)
-        
-        return {
-            "success": True,
-            "data": result,
-            "message": f"批量处理完成: 成功 {result.success}/{result.total}"
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"批量获取股票数据失败: {str(e)}")
+    # 保序去重后校验格式，避免重复抓取和无效请求
+    unique_codes = list(dict.fromkeys(stock_codes))
+    valid_codes = [code for code in unique_codes if _STOCK_CODE_RE.match(code)]
+    invalid_codes = [code for code in unique_codes if not _STOCK_CODE_RE.match(code)]
+    
+    result = await service.batch_fetch_stocks(valid_codes, batch_size, max_concurrency)
+    
+    return {
+        "success": True,
+        "data": result,
+        "invalid_codes": invalid_codes,
+        "message": f"批量处理完成: 成功 {result.success}/{result.total}"
+    }
 
 
 @router.get("/stats/database", summary="获取数据库统计")
+@handle_errors("获取数据库统计失败")
 async def get_database_stats(
     service: StockService = Depends(get_stock_service)
 ):
     """
     获取数据库统计信息
     """
-    try:
-        # 确保数据库连接
-        if not db_manager.client:
-            db_manager.connect()
-            
-        stats = await service.get_database_stats()
-        
-        return {
-            "success": True,
-            "data": stats,
-            "message": "数据库统计信息获取成功"
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取数据库统计失败: {str(e)}")
+    stats = await service.get_database_stats()
+    
+    return {
+        "success": True,
+        "data": stats,
+        "message": "数据库统计信息获取成功"
+    }
 
 
 # ==================== 数据刷新相关API ====================
 
 @router.post("/refresh/single/{stock_code}", summary="刷新单只股票数据")
+@handle_errors("刷新股票 {stock_code} 失败")
 async def refresh_single_stock(
-    stock_code: str,
+    stock_code: str = Path(..., pattern=STOCK_CODE_PATTERN, description="股票代码"),
     scheduler: StockRefreshScheduler = Depends(get_scheduler)
 ):
     """
     刷新指定股票的数据
     """
-    try:
-        # 确保数据库连接
-        if not db_manager.client:
-            db_manager.connect()
-        
-        # 执行单只股票刷新
-        task = await scheduler.refresh_single_stock(stock_code)
-        
-        # 使用 model_dump(mode='json') 来确保所有字段都被正确序列化
-        task_data = task.model_dump(mode='json')
+    # 执行单只股票刷新
+    task = await scheduler.refresh_single_stock(stock_code)
+    
+    # 使用 model_dump(mode='json') 来确保所有字段都被正确序列化
+    task_data = task.model_dump(mode='json')
 
-        return {
-            "success": True,
-            "data": task_data,
-            "message": f"股票 {stock_code} 刷新任务已完成"
-        }
-        
-    except Exception as e:
-        # 增加日志记录，以便于调试
-        logger.error(f"刷新股票 {stock_code} 接口调用失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"刷新股票 {stock_code} 失败: {str(e)}")
+    return {
+        "success": True,
+        "data": task_data,
+        "message": f"股票 {stock_code} 刷新任务已完成"
+    }
 
 
 @router.post("/refresh/global", summary="触发全局股票数据刷新")
+@handle_errors("触发全局刷新失败")
 async def trigger_global_refresh(
     scheduler: StockRefreshScheduler = Depends(get_scheduler)
 ):
     """
     手动触发全局股票数据刷新
     """
-    try:
-        # 确保数据库连接
-        if not db_manager.client:
-            db_manager.connect()
-        
-        # 创建异步任务执行全局刷新
-        import asyncio
-        task_id = f"manual_global_refresh_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        
-        # 在后台执行全局刷新
-        asyncio.create_task(scheduler._execute_global_refresh())
-        
-        return {
-            "success": True,
-            "data": {
-                "task_id": task_id,
-                "status": "started",
-                "message": "全局刷新任务已启动，正在后台执行"
-            },
-            "message": "全局股票数据刷新任务已启动"
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"触发全局刷新失败: {str(e)}")
+    if scheduler.is_refresh_running():
+        raise HTTPException(status_code=409, detail="全局刷新任务正在执行，请稍后再试")
+    
+    # 在后台执行全局刷新
+    task_id = scheduler.start_global_refresh()
+    
+    return {
+        "success": True,
+        "data": {
+            "task_id": task_id,
+            "status": "started",
+            "message": "全局刷新任务已启动，正在后台执行"
+        },
+        "message": "全局股票数据刷新任务已启动"
+    }
 
 
 @router.get("/refresh/tasks", summary="获取刷新任务列表")
+@handle_errors("获取刷新任务失败")
 async def get_refresh_tasks(
     limit: int = Query(10, description="返回任务数量"),
     scheduler: StockRefreshScheduler = Depends(get_scheduler)
@@ -333,25 +475,18 @@ async def get_refresh_tasks(
     """
     获取最近的刷新任务列表
     """
-    try:
-        # 确保数据库连接
-        if not db_manager.client:
-            db_manager.connect()
-        
-        tasks = await scheduler.get_recent_tasks(limit)
-        
-        return {
-            "success": True,
-            "data": [task.model_dump() for task in tasks],
-            "total": len(tasks),
-            "message": f"获取到 {len(tasks)} 个刷新任务"
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取刷新任务失败: {str(e)}")
+    tasks = await scheduler.get_recent_tasks(limit)
+    
+    return {
+        "success": True,
+        "data": [task.model_dump(mode='json') for task in tasks],
+        "total": len(tasks),
+        "message": f"获取到 {len(tasks)} 个刷新任务"
+    }
 
 
 @router.get("/refresh/tasks/{task_id}", summary="获取刷新任务状态")
+@handle_errors("获取任务状态失败")
 async def get_refresh_task_status(
     task_id: str,
     scheduler: StockRefreshScheduler = Depends(get_scheduler)
@@ -359,44 +494,35 @@ async def get_refresh_task_status(
     """
     获取指定刷新任务的状态
     """
-    try:
-        # 确保数据库连接
-        if not db_manager.client:
-            db_manager.connect()
-        
-        task = await scheduler.get_task_status(task_id)
-        
-        if not task:
-            raise HTTPException(status_code=404, detail=f"未找到任务 {task_id}")
-        
-        return {
-            "success": True,
-            "data": task.model_dump(),
-            "message": f"任务 {task_id} 状态获取成功"
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取任务状态失败: {str(e)}")
+    task = await scheduler.get_task_status(task_id)
+    
+    if not task:
+        raise HTTPException(status_code=404, detail=f"未找到任务 {task_id}")
+    
+    return {
+        "success": True,
+        "data": task.model_dump(mode='json'),
+        "message": f"任务 {task_id} 状态获取成功"
+    }
 
 
 @router.get("/scheduler/status", summary="获取调度器状态")
+@handle_errors("获取调度器状态失败")
 async def get_scheduler_status(
+    response: Response,
     scheduler: StockRefreshScheduler = Depends(get_scheduler)
 ):
     """
     获取调度器运行状态和配置信息
     """
-    try:
-        status = scheduler.get_scheduler_status()
-        
-        return {
-            "success": True,
-            "data": status,
-            "message": "调度器状态获取成功"
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取调度器状态失败: {str(e)}")
+    status = scheduler.get_scheduler_status()
+    
+    # 允许代理短时缓存，吸收仪表盘的高频轮询
+    response.headers["Cache-Control"] = "max-age=2"
+    
+    return {
+        "success": True,
+        "data": status,
+        "message": "调度器状态获取成功"
+    }
 
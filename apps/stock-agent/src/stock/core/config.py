@@ -3,6 +3,8 @@ Stock Agent 服务配置
 """
 from __future__ import annotations
 import os
+from functools import lru_cache
+from typing import Optional
 from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pathlib import Path
@@ -15,12 +17,19 @@ class ApiConfig(BaseModel):
     host: str = "0.0.0.0"
     port: int = 8020
     debug: bool = False
+    workers: int = 1  # 工作进程数，0 表示按 CPU 核数自动设置；调试模式下固定为 1
 
 class DatabaseConfig(BaseModel):
     """数据库配置"""
     uri: str = "mongodb://localhost:27017/"
     database: str = "stock_data"
-    timeout: int = 5000
+    timeout: int = 5000  # 服务器选择超时(毫秒)
+    max_pool_size: int = 100  # 单进程连接池上限
+    min_pool_size: int = 10  # 预热保持的最少连接数
+    max_idle_time_ms: int = 300000  # 空闲连接回收时间，避免复用已失效的连接
+    socket_timeout_ms: int = 5000
+    connect_timeout_ms: int = 3000
+    wait_queue_timeout_ms: int = 2000  # 连接池耗尽时的最长等待时间
     
     def get_connection_uri(self) -> str:
         """获取连接URI"""
@@ -32,6 +41,19 @@ class DatabaseConfig(BaseModel):
                 return f"{self.uri}/{self.database}"
         return self.uri
     
+    def get_client_options(self) -> dict:
+        """获取客户端连接池参数"""
+        return {
+            "maxPoolSize": self.max_pool_size,
+            "minPoolSize": self.min_pool_size,
+            "maxIdleTimeMS": self.max_idle_time_ms,
+            "serverSelectionTimeoutMS": self.timeout,
+            "socketTimeoutMS": self.socket_timeout_ms,
+            "connectTimeoutMS": self.connect_timeout_ms,
+            "waitQueueTimeoutMS": self.wait_queue_timeout_ms,
+            "retryWrites": True,
+        }
+    
     def get_connection_info(self) -> dict:
         """获取连接信息（隐藏敏感信息）"""
         return {
@@ -44,10 +66,24 @@ class DatabaseConfig(BaseModel):
 class DataFetcherConfig(BaseModel):
     """数据获取器配置"""
     request_timeout: float = 30.0
-    request_delay: float = 0.5  # 增加默认延迟以避免IP被封
+    # 各数据源限速（次/秒），不同主机互不影响，避免IP被封
+    eastmoney_rate_limit: float = 20.0
+    tencent_rate_limit: float = 30.0
+    akshare_rate_limit: float = 5.0
     retry_count: int = 3
+    max_concurrency: int = 8  # 批量刷新时同时抓取的股票数上限
+    # 股东报告期数据的磁盘缓存目录（相对路径按项目根目录解析），为空时不落盘
+    cache_dir: str = "data/stock-agent/cache"
     user_agent: str = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3"
 
+    @property
+    def cache_path(self) -> Optional[Path]:
+        """磁盘缓存目录的绝对路径，不随进程工作目录变化"""
+        if not self.cache_dir:
+            return None
+        path = Path(self.cache_dir)
+        return path if path.is_absolute() else ROOT_DIR / path
+
 class SystemConfig(BaseSettings):
     """系统总配置"""
     model_config = SettingsConfigDict(
@@ -69,9 +105,11 @@ class SystemConfig(BaseSettings):
     database: DatabaseConfig = Field(default_factory=DatabaseConfig)
     data: DataFetcherConfig = Field(default_factory=DataFetcherConfig)
 
-# 全局配置实例
-settings = SystemConfig()
-
+@lru_cache(maxsize=1)
 def get_config() -> SystemConfig:
-    """获取全局配置"""
-    return settings
+    """获取全局配置（单例，首次调用时解析 .env 并校验）"""
+    return SystemConfig()
+
+
+# 全局配置实例
+settings = get_config()
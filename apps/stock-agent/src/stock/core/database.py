@@ -2,40 +2,48 @@
 数据库连接管理
 """
 
-import pymongo
 from typing import Optional
 from loguru import logger
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, IndexModel
 
-from .config import settings
+from .config import get_config
 
 
 class DatabaseManager:
     """MongoDB数据库管理器"""
     
     def __init__(self):
-        self._client: Optional[pymongo.MongoClient] = None
+        self._client: Optional[AsyncIOMotorClient] = None
         self._db = None
         
-    def connect(self) -> bool:
+    async def connect(self) -> bool:
         """连接数据库"""
         try:
+            db_config = get_config().database
+            
             # 获取连接URI
-            connection_uri = settings.database.get_connection_uri()
+            connection_uri = db_config.get_connection_uri()
             
             # 创建客户端连接
-            self._client = pymongo.MongoClient(connection_uri)
+            self._client = AsyncIOMotorClient(
+                connection_uri,
+                **db_config.get_client_options()
+            )
             
             # 测试连接
-            self._client.admin.command('ping')
-            self._db = self._client[settings.database.database]
+            await self._client.admin.command('ping')
+            self._db = self._client[db_config.database]
             
             # 记录连接信息（隐藏敏感信息）
-            conn_info = settings.database.get_connection_info()
+            conn_info = db_config.get_connection_info()
             logger.info(f"✅ 成功连接到MongoDB")
             logger.info(f"   主机: {conn_info['host']}:{conn_info['port']}")
             logger.info(f"   数据库: {conn_info['database']}")
             logger.info(f"   认证: {conn_info['auth_mode']}")
             
+            await self._ensure_indexes()
+            
             return True
             
         except Exception as e:
@@ -43,6 +51,25 @@ class DatabaseManager:
             logger.error(f"   请检查MongoDB服务是否运行，以及连接配置是否正确")
             return False
     
+    async def _ensure_indexes(self):
+        """创建查询所需索引（已存在时为空操作）"""
+        try:
+            await self._db.stocks.create_indexes([
+                IndexModel([("stock_code", ASCENDING)], unique=True),
+                IndexModel([("basic_info.industry", ASCENDING), ("basic_info.total_market_cap", ASCENDING)]),
+                IndexModel([("basic_info.industry", ASCENDING), ("stock_code", ASCENDING)]),
+                IndexModel([("basic_info.total_market_cap", ASCENDING)]),
+                IndexModel([("basic_info.pe_ttm", ASCENDING)]),
+                IndexModel([("update_time", DESCENDING)]),
+            ])
+            await self._db.tasks.create_indexes([
+                IndexModel([("task_id", ASCENDING)], unique=True),
+                IndexModel([("created_time", DESCENDING)]),
+            ])
+        except Exception as e:
+            # 索引创建失败（如存在重复数据）不影响服务使用
+            logger.warning(f"⚠️ MongoDB索引创建失败: {e}")
+    
     def disconnect(self):
         """断开数据库连接"""
         if self._client:
@@ -52,7 +79,7 @@ class DatabaseManager:
             logger.info("MongoDB连接已关闭")
     
     @property
-    def client(self) -> Optional[pymongo.MongoClient]:
+    def client(self) -> Optional[AsyncIOMotorClient]:
         """获取数据库客户端"""
         return self._client
     
@@ -75,11 +102,11 @@ class DatabaseManager:
             raise RuntimeError("数据库未连接")
         return self._db.tasks
     
-    def __enter__(self):
-        self.connect()
+    async def __aenter__(self):
+        await self.connect()
         return self
     
-    def __exit__(self, exc_type, exc_val, exc_tb):
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
         self.disconnect()
 
 
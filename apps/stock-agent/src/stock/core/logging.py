@@ -6,11 +6,19 @@ import sys
 from loguru import logger
 from pathlib import Path
 
-from .config import settings
+from .config import get_config
+
+# 日志是否已初始化（避免重复导入或热重载时重复添加处理器）
+_INITIALIZED = False
 
 
 def setup_logging():
-    """设置日志配置"""
+    """设置日志配置（幂等，重复调用不会重复添加处理器）"""
+    global _INITIALIZED
+    if _INITIALIZED:
+        return
+    
+    settings = get_config()
     
     # 移除默认处理器
     logger.remove()
@@ -52,6 +60,7 @@ def setup_logging():
         retention="7 days",
         compression="zip",
         encoding="utf-8",
+        enqueue=True,  # 写文件和轮转压缩在后台线程完成，不阻塞调用方
     )
     
     # 添加文件处理器 - 错误日志
@@ -63,8 +72,10 @@ def setup_logging():
         retention="30 days",
         compression="zip",
         encoding="utf-8",
+        enqueue=True,
     )
     
+    _INITIALIZED = True
     logger.info(f"日志系统已初始化，调试模式: {settings.api.debug}")
 
 
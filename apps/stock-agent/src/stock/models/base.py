@@ -4,7 +4,7 @@ Stock Agent 基础数据模型
 
 from datetime import datetime
 from typing import List, Dict, Any, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class StockData(BaseModel):
@@ -20,6 +20,8 @@ class StockData(BaseModel):
 
 class StockQuery(BaseModel):
     """股票查询条件模型"""
+    model_config = ConfigDict(frozen=True, extra='ignore')
+    
     codes: Optional[List[str]] = Field(None, description="股票代码列表")
     industries: Optional[List[str]] = Field(None, description="行业列表")
     min_market_cap: Optional[float] = Field(None, description="最小市值(亿元)")
@@ -32,6 +34,8 @@ class StockQuery(BaseModel):
 
 class BatchProcessResult(BaseModel):
     """批处理结果模型"""
+    model_config = ConfigDict(frozen=True, extra='ignore')
+    
     total: int = Field(..., description="总数量")
     success: int = Field(..., description="成功数量")
     failed: int = Field(..., description="失败数量")
@@ -2,23 +2,119 @@
 股票数据获取服务
 """
 
+import asyncio
+import inspect
 import time
-import requests
+from pathlib import Path
+import httpx
+import orjson
 import akshare as ak
+import numpy as np
 import pandas as pd
+from collections import defaultdict
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from functools import wraps
 from loguru import logger
 
 from ..core.config import settings
-from ..utils.helpers import safe_convert_value, determine_market, format_secid, classify_holder_type
+from ..utils.helpers import safe_convert_value, determine_market, format_secid, classify_holder_type_series
+from ..utils.cache import TTLCache
+from ..utils.rate_limit import AsyncRateLimiter
+
+
+# 远程数据短期缓存，模块级共享，避免同一股票在短时间内被重复请求
+# 基本信息: stock_code -> dict
+_basic_info_cache = TTLCache(ttl=60, maxsize=4096)
+# K线: (stock_code, period, count) -> list
+_kline_cache = TTLCache(ttl=300, maxsize=8192)
+# 股东明细: 报告期 -> {股票代码: 该股股东 DataFrame}（体积较大，只保留少量报告期）
+_holder_cache = TTLCache(ttl=3600, maxsize=8)
+
+# 东方财富基本信息数值字段: (输出字段, 接口字段, 除数, 缺省值)
+_BASIC_INFO_FIELDS = (
+    ("latest_price", "f43", 100, 0),
+    ("pe_ttm", "f167", 1, "N/A"),
+    ("pb", "f60", 1, "N/A"),
+    ("turnover_rate", "f168", 1, 0),
+    ("total_market_cap", "f116", 100000000, 0),
+    ("circulating_market_cap", "f117", 100000000, 0),
+    ("week52_high", "f84", 100, 0),
+    ("week52_low", "f85", 100, 0),
+    ("dividend_yield", "f170", 1, 0),
+    ("roe", "f162", 1, "N/A"),
+    ("eps", "f92", 1, "N/A"),
+    ("bps", "f71", 1, "N/A"),
+    ("total_shares", "f86", 10000, 0),
+    ("circulating_shares", "f169", 10000, 0),
+    ("beta", "f105", 1, "N/A"),
+)
+
+# 各数据源独立限速，模块级共享
+_eastmoney_limiter = AsyncRateLimiter(settings.data.eastmoney_rate_limit)
+_tencent_limiter = AsyncRateLimiter(settings.data.tencent_rate_limit)
+_akshare_limiter = AsyncRateLimiter(settings.data.akshare_rate_limit)
+
+# 每个报告期一把锁：并发抓取时同一报告期只由一个线程下载，其余协程等待后直接读缓存
+_holder_load_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+# 股东报告期数据磁盘缓存有效期（秒）：报告期内披露陆续增加，需定期刷新
+_HOLDER_DISK_CACHE_TTL = 24 * 3600
+
+# 股东记录实际使用的列，缓存时丢弃其余列
+_HOLDER_COLUMNS = (
+    "股票代码", "股东名称", "期末持股-数量", "期末持股-数量变化",
+    "质押或冻结数量", "期末持股-变化比例"
+)
+
+
+# 当天的A股代码列表缓存 (日期, 代码)：列表每天最多变化一次，失败结果不缓存
+_stock_codes_cache: Tuple[str, Tuple[str, ...]] = ("", ())
+# 代码列表未命中时只由一个协程调用 akshare，其余协程等待后直接读缓存
+_stock_codes_lock = asyncio.Lock()
+
+
+def _fetch_stock_codes() -> Tuple[str, ...]:
+    """从 akshare 获取A股代码列表（同步调用）"""
+    return tuple(ak.stock_info_a_code_name()['code'].tolist())
+
+
+async def _stock_codes_for_day(day_key: str) -> Tuple[str, ...]:
+    """获取指定交易日的A股代码列表，仅在缓存未命中时占用 akshare 限流配额"""
+    global _stock_codes_cache
+    if _stock_codes_cache[0] == day_key:
+        return _stock_codes_cache[1]
+    
+    async with _stock_codes_lock:
+        # 等锁期间可能已由其他协程加载完成
+        if _stock_codes_cache[0] != day_key:
+            # akshare 为同步调用，放到线程中执行
+            async with _akshare_limiter:
+                codes = await asyncio.to_thread(_fetch_stock_codes)
+            _stock_codes_cache = (day_key, codes)
+        return _stock_codes_cache[1]
 
 
 def api_retry(func):
     """
     装饰器：对akshare API调用进行重试，并记录详细日志。
+    同时支持同步函数和协程函数。
     """
+    if inspect.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(self, *args, **kwargs):
+            for i in range(settings.data.retry_count):
+                try:
+                    logger.debug(f"尝试第 {i+1}/{settings.data.retry_count} 次调用 {func.__name__}...")
+                    result = await func(self, *args, **kwargs)
+                    logger.debug(f"✅ 成功调用 {func.__name__} 第 {i+1}/{settings.data.retry_count} 次。")
+                    return result
+                except Exception as e:
+                    logger.warning(f"❌ 调用 {func.__name__} 失败 (第 {i+1}/{settings.data.retry_count} 次)。错误: {e}")
+                    if i == settings.data.retry_count - 1:
+                        raise
+        return async_wrapper
+    
     @wraps(func)
     def wrapper(self, *args, **kwargs):
         for i in range(settings.data.retry_count):
@@ -38,42 +134,62 @@ class StockDataFetcher:
     """股票数据获取器"""
     
     def __init__(self):
-        self.session = self._create_session()
-        self._holder_cache: Dict[str, pd.DataFrame] = {}
-        
-    def _create_session(self) -> requests.Session:
-        """创建HTTP会话"""
-        session = requests.Session()
+        self.client = self._create_client()
         
+    def _create_client(self) -> httpx.AsyncClient:
+        """创建异步HTTP客户端"""
         headers = {
             "User-Agent": settings.data.user_agent,
             "Referer": "https://finance.sina.com.cn/",
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
             "Accept-Language": "zh-CN,zh;q=0.9",
-            "Connection": "keep-alive",
         }
-        session.headers.update(headers)
         
-        # 配置连接池
-        adapter = requests.adapters.HTTPAdapter(pool_connections=10, pool_maxsize=20)
-        session.mount('http://', adapter)
-        session.mount('https://', adapter)
-        
-        return session
+        # 配置连接池：东财、腾讯行情、腾讯K线三个主机并发请求，
+        # 保留足够的空闲长连接，避免连接被回收后重复 DNS 解析和握手
+        transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=60,
+                keepalive_expiry=30.0
+            ),
+            retries=2  # 仅重试建连失败，业务层重试由 api_retry 负责
+        )
+        return httpx.AsyncClient(
+            headers=headers,
+            transport=transport,
+            timeout=settings.data.request_timeout,
+            follow_redirects=True
+        )
+    
+    async def aclose(self):
+        """关闭HTTP连接池"""
+        await self.client.aclose()
     
-    def get_all_stock_codes(self) -> List[str]:
-        """获取所有A股股票代码列表"""
+    async def get_all_stock_codes(self) -> List[str]:
+        """获取所有A股股票代码列表（当天内复用首次获取的结果）"""
         try:
-            stock_info_df = ak.stock_info_a_code_name()
-            stock_codes = stock_info_df['code'].tolist()
+            stock_codes = list(await _stock_codes_for_day(datetime.now().strftime("%Y%m%d")))
             logger.info(f"✅ 成功获取 {len(stock_codes)} 个股票代码")
             return stock_codes
         except Exception as e:
             logger.error(f"❌ 获取股票代码失败: {e}")
             return []
     
-    def get_stock_basic_info(self, stock_code: str) -> Dict[str, Any]:
-        """获取股票基本信息"""
+    async def get_stock_basic_info(self, stock_code: str) -> Dict[str, Any]:
+        """获取股票基本信息（60 秒内命中缓存）"""
+        cached = _basic_info_cache.get(stock_code)
+        if cached is not None:
+            return dict(cached)
+        
+        basic_info = await self._fetch_stock_basic_info(stock_code)
+        # 只缓存有效数据，失败结果下次重新请求
+        if basic_info.get("stock_name"):
+            _basic_info_cache.set(stock_code, basic_info)
+        return dict(basic_info)
+    
+    async def _fetch_stock_basic_info(self, stock_code: str) -> Dict[str, Any]:
+        """请求东方财富接口获取股票基本信息"""
         secid = format_secid(stock_code)
         fields = (
             "f57,f58,f43,f168,f60,f167,f47,"  # 原有字段
@@ -83,9 +199,10 @@ class StockDataFetcher:
         url = f"https://push2.eastmoney.com/api/qt/stock/get?secid={secid}&fields={fields}"
         
         try:
-            response = self.session.get(url, timeout=settings.data.request_timeout)
+            async with _eastmoney_limiter:
+                response = await self.client.get(url)
             response.raise_for_status()
-            json_response = response.json()
+            json_response = orjson.loads(response.content)
             
             # 增加对空响应的检查
             if not json_response or not json_response.get("data"):
@@ -99,7 +216,7 @@ class StockDataFetcher:
             
             # 备用方案：腾讯财经接口
             if volume == 0:
-                volume = self._get_volume_from_tencent(stock_code)
+                volume = await self._get_volume_from_tencent(stock_code)
             
             # 处理行业字段
             industry = data.get("f127", "")
@@ -107,38 +224,27 @@ class StockDataFetcher:
                 industry = ""
             
             # 返回扩展的基本信息
-            return {
-                "stock_name": data.get("f58", ""),
-                "latest_price": safe_convert_value(data.get("f43", 0), 100),
-                "pe_ttm": safe_convert_value(data.get("f167", "N/A")),
-                "pb": safe_convert_value(data.get("f60", "N/A")),
-                "turnover_rate": safe_convert_value(data.get("f168", 0)),
-                "heat": volume,
-                "total_market_cap": safe_convert_value(data.get("f116", 0), 100000000),
-                "circulating_market_cap": safe_convert_value(data.get("f117", 0), 100000000),
-                "week52_high": safe_convert_value(data.get("f84", 0), 100),
-                "week52_low": safe_convert_value(data.get("f85", 0), 100),
-                "dividend_yield": safe_convert_value(data.get("f170", 0)),
-                "roe": safe_convert_value(data.get("f162", "N/A")),
-                "eps": safe_convert_value(data.get("f92", "N/A")),
-                "bps": safe_convert_value(data.get("f71", "N/A")),
-                "industry": industry,
-                "total_shares": safe_convert_value(data.get("f86", 0), 10000),
-                "circulating_shares": safe_convert_value(data.get("f169", 0), 10000),
-                "beta": safe_convert_value(data.get("f105", "N/A"))
-            }
+            basic_info = {"stock_name": data.get("f58", "")}
+            basic_info.update(
+                (key, safe_convert_value(data.get(raw_key, default), divisor))
+                for key, raw_key, divisor, default in _BASIC_INFO_FIELDS
+            )
+            basic_info["heat"] = volume
+            basic_info["industry"] = industry
+            return basic_info
         except Exception as e:
             logger.error(f"获取股票 {stock_code} 基本信息失败: {e}")
             return self._get_empty_basic_info()
     
-    def _get_volume_from_tencent(self, stock_code: str) -> float:
+    async def _get_volume_from_tencent(self, stock_code: str) -> float:
         """从腾讯财经获取成交量"""
         try:
             market = determine_market(stock_code)
             symbol = f"{market}{stock_code}"
             url = f"https://qt.gtimg.cn/q=s_{symbol}"
             
-            response = self.session.get(url, timeout=5)
+            async with _tencent_limiter:
+                response = await self.client.get(url, timeout=5)
             if response.status_code == 200:
                 volume_data = response.text
                 parts = volume_data.split('~')
@@ -151,28 +257,13 @@ class StockDataFetcher:
     
     def _get_empty_basic_info(self) -> Dict[str, Any]:
         """获取空的基本信息结构"""
-        return {
-            "stock_name": "",
-            "latest_price": 0,
-            "pe_ttm": 0,
-            "pb": 0,
-            "turnover_rate": 0,
-            "heat": 0,
-            "total_market_cap": 0,
-            "circulating_market_cap": 0,
-            "week52_high": 0,
-            "week52_low": 0,
-            "dividend_yield": 0,
-            "roe": 0,
-            "eps": 0,
-            "bps": 0,
-            "industry": "",
-            "total_shares": 0,
-            "circulating_shares": 0,
-            "beta": 0
-        }
+        empty = {"stock_name": ""}
+        empty.update((key, 0) for key, _, _, _ in _BASIC_INFO_FIELDS)
+        empty["heat"] = 0
+        empty["industry"] = ""
+        return empty
     
-    def get_top_holders(self, stock_code: str) -> List[Dict[str, Any]]:
+    async def get_top_holders(self, stock_code: str) -> List[Dict[str, Any]]:
         """获取前十大股东信息"""
         try:
             current_year = datetime.now().year
@@ -187,42 +278,30 @@ class StockDataFetcher:
             holders = []
             for date in report_dates:
                 try:
-                    df = None
                     # 检查缓存
-                    if date in self._holder_cache:
-                        df = self._holder_cache[date]
-                    else:
-                        # 核心：带重试的获取逻辑
-                        df = self._fetch_holders_with_retry(stock_code, date=date)
-                        if df is not None:
-                            self._holder_cache[date] = df
+                    holders_by_code = _holder_cache.get(date)
+                    if holders_by_code is None:
+                        async with _holder_load_locks[date]:
+                            # 等锁期间可能已由其他协程加载完成
+                            holders_by_code = _holder_cache.get(date)
+                            if holders_by_code is None:
+                                # 核心：带重试的获取逻辑（akshare 同步调用，放到线程中执行）
+                                async with _akshare_limiter:
+                                    holders_by_code = await asyncio.to_thread(
+                                        self._load_holder_groups, stock_code, date
+                                    )
+                                if holders_by_code is not None:
+                                    _holder_cache.set(date, holders_by_code)
+                        if holders_by_code is None:
+                            # 如果获取失败（包括所有重试都失败），则跳过此报告期
+                            continue
 
-                    if df is None:
-                        # 如果获取失败（包括所有重试都失败），则跳过此报告期
-                        continue
-
-                    # 筛选当前股票的股东数据
-                    df_filtered = df[df["股票代码"] == stock_code]
+                    # 当前股票的股东数据
+                    df_filtered = holders_by_code.get(stock_code)
                     
-                    if not df_filtered.empty:
+                    if df_filtered is not None and not df_filtered.empty:
                         # 取前10名股东
-                        for _, row in df_filtered.head(10).iterrows():
-                            holder_name = row["股东名称"]
-                            shares = int(row["期末持股-数量"]) if pd.notna(row["期末持股-数量"]) else 0
-                            ratio = round(float(shares) / 1e8, 4) if shares != 0 else 0
-                            shares_change = int(row.get("期末持股-数量变化", 0)) if pd.notna(row.get("期末持股-数量变化")) else 0
-                            pledged_shares = int(row.get("质押或冻结数量", 0)) if pd.notna(row.get("质押或冻结数量")) else 0
-                            
-                            holders.append({
-                                "holder_name": holder_name,
-                                "shares": shares,
-                                "ratio": ratio,
-                                "report_date": date,
-                                "holder_type": classify_holder_type(holder_name),
-                                "shares_change": shares_change,
-                                "change_ratio": row.get("期末持股-变化比例", "0%"),
-                                "pledged_shares": pledged_shares
-                            })
+                        holders = self._build_holder_records(df_filtered.head(10), date)
                         # 成功获取到一个有效报告期的数据后，就无需再尝试更早的日期
                         break
                 except Exception as e:
@@ -234,6 +313,90 @@ class StockDataFetcher:
             logger.error(f"获取股票 {stock_code} 股东信息失败: {e}")
             return []
 
+    def _load_holder_groups(self, stock_code: str, date: str) -> Optional[Dict[str, pd.DataFrame]]:
+        """
+        获取报告期全市场股东数据，并按股票代码预先分组（之后每只股票 O(1) 查找，无需全表扫描）
+        
+        只保留用到的列和每只股票的前10名股东，减少缓存占用；
+        精简后的数据同时写入磁盘缓存，服务重启后无需重新下载
+        """
+        top = self._read_holder_disk_cache(date)
+        if top is None:
+            df = self._fetch_holders_with_retry(stock_code, date=date)
+            if df is None:
+                return None
+            columns = [col for col in _HOLDER_COLUMNS if col in df.columns]
+            top = df[columns].groupby("股票代码", sort=False).head(10)
+            self._write_holder_disk_cache(date, top)
+        return dict(tuple(top.groupby("股票代码", sort=False)))
+    
+    def _holder_cache_path(self, date: str) -> Optional[Path]:
+        """股东报告期数据的磁盘缓存路径，未配置缓存目录时返回 None"""
+        cache_path = settings.data.cache_path
+        if cache_path is None:
+            return None
+        return cache_path / f"holders_{date}.pkl"
+    
+    def _read_holder_disk_cache(self, date: str) -> Optional[pd.DataFrame]:
+        """读取未过期的股东磁盘缓存"""
+        path = self._holder_cache_path(date)
+        if path is None or not path.exists():
+            return None
+        if time.time() - path.stat().st_mtime > _HOLDER_DISK_CACHE_TTL:
+            return None
+        try:
+            return pd.read_pickle(path)
+        except Exception as e:
+            logger.warning(f"读取股东缓存 {path} 失败: {e}")
+            return None
+    
+    def _write_holder_disk_cache(self, date: str, df: pd.DataFrame) -> None:
+        """写入股东磁盘缓存（失败不影响主流程）"""
+        path = self._holder_cache_path(date)
+        if path is None or df.empty:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # 先写临时文件再替换，避免并发读取到不完整文件
+            tmp_path = path.with_suffix(".tmp")
+            df.to_pickle(tmp_path)
+            tmp_path.replace(path)
+        except Exception as e:
+            logger.warning(f"写入股东缓存 {path} 失败: {e}")
+    
+    def _build_holder_records(self, df: pd.DataFrame, date: str) -> List[Dict[str, Any]]:
+        """按列批量转换股东数据为记录列表"""
+        def int_column(name: str) -> List[int]:
+            # 缺失列或空值按 0 处理
+            if name not in df.columns:
+                return [0] * len(df)
+            return pd.to_numeric(df[name], errors="coerce").fillna(0).astype("int64").tolist()
+        
+        names = df["股东名称"].tolist()
+        holder_types = classify_holder_type_series(df["股东名称"])
+        shares_list = int_column("期末持股-数量")
+        changes = int_column("期末持股-数量变化")
+        pledged = int_column("质押或冻结数量")
+        change_ratios = (
+            df["期末持股-变化比例"].tolist()
+            if "期末持股-变化比例" in df.columns else ["0%"] * len(df)
+        )
+        
+        return [
+            {
+                "holder_name": holder_name,
+                "shares": shares,
+                "ratio": round(float(shares) / 1e8, 4) if shares != 0 else 0,
+                "report_date": date,
+                "holder_type": holder_type,
+                "shares_change": shares_change,
+                "change_ratio": change_ratio,
+                "pledged_shares": pledged_shares
+            }
+            for holder_name, holder_type, shares, shares_change, pledged_shares, change_ratio
+            in zip(names, holder_types, shares_list, changes, pledged, change_ratios, strict=True)
+        ]
+
     @api_retry
     def _fetch_holders_with_retry(self, stock_code: str, date: str) -> Optional[pd.DataFrame]:
         """带重试和详细日志的获取股东信息"""
@@ -251,9 +414,21 @@ class StockDataFetcher:
             logger.warning(f"<-- [akshare] 获取报告期 {date} 数据失败，耗时 {duration:.2f} 秒。")
             raise e
     
+    async def get_kline_data(self, stock_code: str, period: str, count: int) -> List[Dict[str, Any]]:
+        """获取K线数据（5 分钟内命中缓存）"""
+        key = (stock_code, period, count)
+        cached = _kline_cache.get(key)
+        if cached is not None:
+            return [dict(k) for k in cached]
+        
+        klines = await self._fetch_kline_data(stock_code, period, count)
+        if klines:
+            _kline_cache.set(key, klines)
+        return [dict(k) for k in klines]
+    
     @api_retry
-    def get_kline_data(self, stock_code: str, period: str, count: int) -> List[Dict[str, Any]]:
-        """获取K线数据"""
+    async def _fetch_kline_data(self, stock_code: str, period: str, count: int) -> List[Dict[str, Any]]:
+        """请求腾讯财经接口获取K线数据"""
         market = determine_market(stock_code)
         symbol = f"{market}{stock_code}"
         url = (
@@ -262,57 +437,74 @@ class StockDataFetcher:
         )
         
         try:
-            response = self.session.get(url, timeout=settings.data.request_timeout)
+            async with _tencent_limiter:
+                response = await self.client.get(url)
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
             
-            klines = []
-            raw_list = (
-                data.get("data", {})
-                .get(symbol, {})
-                .get("qfq" + period, []) or data["data"][symbol][period]
-            )
+            # 优先取前复权数据，缺失时回退到不复权字段，均缺失则视为无数据
+            entry = (data.get("data") or {}).get(symbol) or {}
+            raw_list = entry.get("qfq" + period) or entry.get(period) or []
             
             # 只取最近count条数据
-            for item in raw_list[-count:]:
-                if len(item) < 6:
-                    continue
-                date, open_, close, high, low, volume = item[:6]
-                open_, close, high, low, volume = map(
-                    lambda x: safe_convert_value(x, 1, 0), 
-                    (open_, close, high, low, volume)
-                )
-                klines.append({
+            rows = [item[:6] for item in raw_list[-count:] if len(item) >= 6]
+            if not rows:
+                return []
+            
+            # 按列整体转换数值，无法解析的值和无穷大按 0 处理（结果可直接写入 MongoDB）
+            frame = pd.DataFrame(rows, columns=["date", "open", "close", "high", "low", "volume"])
+            opens, closes, highs, lows, volumes = np.nan_to_num(
+                frame[["open", "close", "high", "low", "volume"]]
+                .apply(pd.to_numeric, errors="coerce")
+                .to_numpy(dtype=np.float64),
+                nan=0.0, posinf=0.0, neginf=0.0
+            ).T
+            
+            # 计算涨跌幅（首条为 0）
+            prev_closes = np.concatenate((closes[:1], closes[:-1]))
+            diffs = closes - prev_closes
+            changes = np.round(diffs, 2)
+            change_pcts = np.round(
+                np.divide(diffs, prev_closes, out=np.zeros_like(diffs), where=prev_closes != 0) * 100, 2
+            )
+            changes[0] = change_pcts[0] = 0
+            
+            amounts = (opens + closes) / 2 * volumes / 1e8  # 亿元
+            volumes = volumes / 1e4  # 万手
+            
+            return [
+                {
                     "date": date,
                     "open": open_,
                     "high": high,
                     "low": low,
                     "close": close,
-                    "volume": volume / 1e4,  # 万手
-                    "amount": (open_ + close) / 2 * volume / 1e8,  # 亿元
-                })
-            
-            # 计算涨跌幅
-            for i in range(1, len(klines)):
-                prev = klines[i - 1]["close"]
-                curr = klines[i]["close"]
-                klines[i]["change"] = round(curr - prev, 2)
-                klines[i]["change_pct"] = round((curr - prev) / prev * 100, 2) if prev != 0 else 0
-            
-            if klines:
-                klines[0]["change"] = klines[0]["change_pct"] = 0
-            
-            return klines
+                    "volume": volume,
+                    "amount": amount,
+                    "change": change,
+                    "change_pct": change_pct,
+                }
+                for date, open_, high, low, close, volume, amount, change, change_pct in zip(
+                    frame["date"].tolist(), opens.tolist(), highs.tolist(), lows.tolist(),
+                    closes.tolist(), volumes.tolist(), amounts.tolist(),
+                    changes.tolist(), change_pcts.tolist(), strict=True
+                )
+            ]
         except Exception as e:
             logger.error(f"获取股票 {stock_code} K线数据失败 ({period}): {e}")
             return []
     
-    def get_stock_complete_data(self, stock_code: str) -> Dict[str, Any]:
+    async def get_stock_complete_data(self, stock_code: str) -> Dict[str, Any]:
         """获取单只股票的完整数据"""
         logger.info(f"开始获取股票 {stock_code} 的完整数据")
         
-        # 获取基本信息
-        basic_info = self.get_stock_basic_info(stock_code)
+        # 并发获取基本信息、股东信息、日K线（最近22个交易日）和月K线（最近24个月）
+        basic_info, holders, day_kline, month_kline = await asyncio.gather(
+            self.get_stock_basic_info(stock_code),
+            self.get_top_holders(stock_code),
+            self.get_kline_data(stock_code, "day", 22),
+            self.get_kline_data(stock_code, "month", 24)
+        )
         stock_name = basic_info["stock_name"]
         
         if stock_name:
@@ -320,21 +512,10 @@ class StockDataFetcher:
         else:
             logger.warning(f"⚠️ 股票 {stock_code} 基本信息获取失败")
         
-        # 获取股东信息
-        holders = self.get_top_holders(stock_code)
         logger.info(f"✅ 股东信息获取完成: {len(holders)} 条")
-        
-        # 获取日K线数据（最近22个交易日）
-        day_kline = self.get_kline_data(stock_code, "day", 22)
         logger.info(f"✅ 日K线获取完成: {len(day_kline)} 条")
-        
-        # 获取月K线数据（最近24个月）
-        month_kline = self.get_kline_data(stock_code, "month", 24)
         logger.info(f"✅ 月K线获取完成: {len(month_kline)} 条")
         
-        # 添加延迟避免频率限制
-        time.sleep(settings.data.request_delay)
-        
         return {
             "stock_code": stock_code,
             "basic_info": basic_info,
@@ -342,4 +523,3 @@ class StockDataFetcher:
             "kline_day": day_kline,
             "kline_month": month_kline
         }
-
@@ -2,13 +2,21 @@
 与 RAG-Analysis 系统的集成适配器
 """
 
+import asyncio
+import heapq
 import httpx
+import orjson
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 from loguru import logger
 
 from ..core.config import settings
 from ..models.base import StockQuery
+from ..utils.cache import TTLCache
+
+
+# 对比分析排名返回的股票数上限
+_RANKING_TOP_N = 20
 
 
 class RAGIntegrationAdapter:
@@ -17,6 +25,57 @@ class RAGIntegrationAdapter:
     def __init__(self, rag_base_url: str = "http://localhost:8010"):
         self.rag_base_url = rag_base_url
         self.stock_base_url = f"http://{settings.api.host}:{settings.api.port}/api/v1"
+        # 长连接客户端，在适配器生命周期内复用连接池
+        self._client = httpx.AsyncClient(
+            base_url=self.stock_base_url,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30),
+            timeout=httpx.Timeout(10.0)
+        )
+        # 限制对股票接口的并发请求数
+        self._sem = asyncio.Semaphore(16)
+        # 行业分析结果缓存: (行业, 数量) -> 分析结果
+        self._sector_cache = TTLCache(ttl=120, maxsize=256)
+    
+    async def aclose(self):
+        """关闭 HTTP 连接池"""
+        await self._client.aclose()
+    
+    async def _fetch_stock(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """获取单只股票详情，失败时返回 None"""
+        async with self._sem:
+            response = await self._client.get(f"/stocks/{symbol}")
+        if response.status_code != 200:
+            logger.warning(f"获取股票 {symbol} 数据失败: {response.status_code}")
+            return None
+        return orjson.loads(response.content)["data"]
+    
+    async def _fetch_stocks(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """批量获取多只股票详情，返回 {股票代码: 数据}，失败的股票被忽略"""
+        response = await self._client.post("/stocks/batch", json={"codes": symbols})
+        if response.status_code == 200:
+            stocks = orjson.loads(response.content)["data"]
+            # 按请求顺序返回
+            return {symbol: stocks[symbol] for symbol in symbols if symbol in stocks}
+        
+        # 旧版本服务没有批量接口时，退回逐只并发请求
+        if response.status_code != 404:
+            logger.warning(f"批量获取股票数据失败: {response.status_code}，改为逐只获取")
+        return await self._fetch_stocks_individually(symbols)
+    
+    async def _fetch_stocks_individually(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """逐只并发获取股票详情"""
+        results = await asyncio.gather(
+            *(self._fetch_stock(symbol) for symbol in symbols),
+            return_exceptions=True
+        )
+        
+        stocks = {}
+        for symbol, result in zip(symbols, results, strict=True):
+            if isinstance(result, Exception):
+                logger.error(f"获取股票 {symbol} 数据异常: {result}")
+            elif result is not None:
+                stocks[symbol] = result
+        return stocks
         
     async def provide_market_context(self, symbols: List[str], time_horizon: str = "medium") -> Dict[str, Any]:
         """
@@ -30,42 +89,72 @@ class RAGIntegrationAdapter:
             标准化的市场上下文数据
         """
         try:
-            async with httpx.AsyncClient() as client:
-                market_context = {
-                    "timestamp": datetime.now().isoformat(),
-                    "symbols": symbols,
-                    "time_horizon": time_horizon,
-                    "data": {}
-                }
-                
-                # 获取每只股票的详细数据
-                for symbol in symbols:
-                    try:
-                        response = await client.get(f"{self.stock_base_url}/stocks/{symbol}")
-                        if response.status_code == 200:
-                            stock_data = response.json()["data"]
-                            
-                            # 转换为 RAG 友好的格式
-                            market_context["data"][symbol] = self._format_for_rag(stock_data)
-                        else:
-                            logger.warning(f"获取股票 {symbol} 数据失败: {response.status_code}")
-                            
-                    except Exception as e:
-                        logger.error(f"获取股票 {symbol} 数据异常: {e}")
-                
-                # 添加行业和市场概况
-                market_context["industry_overview"] = await self._get_industry_overview(symbols)
-                market_context["market_summary"] = await self._get_market_summary()
-                
-                return market_context
-                
+            market_context = {
+                "timestamp": datetime.now().isoformat(),
+                "symbols": symbols,
+                "time_horizon": time_horizon,
+                "data": {}
+            }
+            
+            # 并发获取每只股票的详细数据以及行业、市场概况
+            stocks, industry_overview, market_summary = await asyncio.gather(
+                self._fetch_stocks(symbols),
+                self._get_industry_overview(symbols),
+                self._get_market_summary()
+            )
+            
+            # 转换为 RAG 友好的格式（保持请求中的股票顺序）
+            for symbol, stock_data in stocks.items():
+                market_context["data"][symbol] = self._format_for_rag(stock_data)
+            
+            market_context["industry_overview"] = industry_overview
+            market_context["market_summary"] = market_summary
+            
+            return market_context
+            
         except Exception as e:
             logger.error(f"提供市场上下文失败: {e}")
             return {"error": str(e), "symbols": symbols}
     
+    async def provide_single_market_context(self, symbol: str, time_horizon: str = "medium") -> Dict[str, Any]:
+        """
+        为单只股票提供市场上下文数据（快速路径，跳过多股票遍历）
+        
+        Args:
+            symbol: 股票代码
+            time_horizon: 时间范围 (immediate/short/medium/long/extended)
+            
+        Returns:
+            标准化的市场上下文数据，结构与 provide_market_context 一致
+        """
+        try:
+            market_context = {
+                "timestamp": datetime.now().isoformat(),
+                "symbols": [symbol],
+                "time_horizon": time_horizon,
+                "data": {}
+            }
+            
+            stock_data, industry_overview, market_summary = await asyncio.gather(
+                self._fetch_stock(symbol),
+                self._get_industry_overview([symbol]),
+                self._get_market_summary()
+            )
+            if stock_data is not None:
+                market_context["data"][symbol] = self._format_for_rag(stock_data)
+            
+            market_context["industry_overview"] = industry_overview
+            market_context["market_summary"] = market_summary
+            
+            return market_context
+            
+        except Exception as e:
+            logger.error(f"提供股票 {symbol} 市场上下文失败: {e}")
+            return {"error": str(e), "symbols": [symbol]}
+    
     async def get_sector_analysis(self, industry: str, limit: int = 20) -> Dict[str, Any]:
         """
-        获取行业分析数据
+        获取行业分析数据（相同行业和数量的结果缓存 2 分钟）
         
         Args:
             industry: 行业名称
@@ -74,44 +163,56 @@ class RAGIntegrationAdapter:
         Returns:
             行业分析数据
         """
+        key = (industry, limit)
+        cached = self._sector_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        analysis = await self._build_sector_analysis(industry, limit)
+        # 失败结果不缓存
+        if "error" not in analysis:
+            self._sector_cache.set(key, analysis)
+        return analysis
+    
+    async def _build_sector_analysis(self, industry: str, limit: int) -> Dict[str, Any]:
+        """请求行业股票数据并计算行业分析"""
         try:
-            async with httpx.AsyncClient() as client:
-                # 获取行业股票列表
-                response = await client.get(
-                    f"{self.stock_base_url}/stocks/",
-                    params={"industries": [industry]}
-                )
-                
-                if response.status_code != 200:
-                    return {"error": "获取行业数据失败", "industry": industry}
-                
-                stocks_data = response.json()["data"][:limit]
-                
-                # 分析行业数据
-                sector_analysis = {
-                    "industry": industry,
-                    "timestamp": datetime.now().isoformat(),
-                    "total_companies": len(stocks_data),
-                    "companies": [],
-                    "sector_metrics": self._calculate_sector_metrics(stocks_data)
+            # 获取行业股票列表
+            response = await self._client.get(
+                "/stocks/",
+                params={"industries": [industry], "fields": ["stock_code", "basic_info"]}
+            )
+            
+            if response.status_code != 200:
+                return {"error": "获取行业数据失败", "industry": industry}
+            
+            stocks_data = orjson.loads(response.content)["data"][:limit]
+            
+            # 分析行业数据
+            sector_analysis = {
+                "industry": industry,
+                "timestamp": datetime.now().isoformat(),
+                "total_companies": len(stocks_data),
+                "companies": [],
+                "sector_metrics": self._calculate_sector_metrics(stocks_data)
+            }
+            
+            # 处理每只股票的数据
+            for stock in stocks_data:
+                company_info = {
+                    "code": stock["stock_code"],
+                    "name": stock["basic_info"]["stock_name"],
+                    "market_cap": stock["basic_info"]["total_market_cap"],
+                    "pe_ratio": stock["basic_info"]["pe_ttm"],
+                    "pb_ratio": stock["basic_info"]["pb"],
+                    "roe": stock["basic_info"]["roe"],
+                    "latest_price": stock["basic_info"]["latest_price"],
+                    "area": stock["basic_info"]["area"]
                 }
-                
-                # 处理每只股票的数据
-                for stock in stocks_data:
-                    company_info = {
-                        "code": stock["stock_code"],
-                        "name": stock["basic_info"]["stock_name"],
-                        "market_cap": stock["basic_info"]["total_market_cap"],
-                        "pe_ratio": stock["basic_info"]["pe_ttm"],
-                        "pb_ratio": stock["basic_info"]["pb"],
-                        "roe": stock["basic_info"]["roe"],
-                        "latest_price": stock["basic_info"]["latest_price"],
-                        "area": stock["basic_info"]["area"]
-                    }
-                    sector_analysis["companies"].append(company_info)
-                
-                return sector_analysis
-                
+                sector_analysis["companies"].append(company_info)
+            
+            return sector_analysis
+            
         except Exception as e:
             logger.error(f"获取行业分析失败: {e}")
             return {"error": str(e), "industry": industry}
@@ -127,34 +228,25 @@ class RAGIntegrationAdapter:
             对比分析数据
         """
         try:
-            async with httpx.AsyncClient() as client:
-                comparative_data = {
-                    "timestamp": datetime.now().isoformat(),
-                    "symbols": symbols,
-                    "comparison": {},
-                    "ranking": {}
-                }
-                
-                stocks_data = []
-                
-                # 获取所有股票数据
-                for symbol in symbols:
-                    try:
-                        response = await client.get(f"{self.stock_base_url}/stocks/{symbol}")
-                        if response.status_code == 200:
-                            stocks_data.append(response.json()["data"])
-                    except Exception as e:
-                        logger.warning(f"获取股票 {symbol} 数据失败: {e}")
-                
-                if not stocks_data:
-                    return {"error": "未获取到有效股票数据", "symbols": symbols}
-                
-                # 生成对比数据
-                comparative_data["comparison"] = self._generate_comparison(stocks_data)
-                comparative_data["ranking"] = self._generate_ranking(stocks_data)
-                
-                return comparative_data
-                
+            comparative_data = {
+                "timestamp": datetime.now().isoformat(),
+                "symbols": symbols,
+                "comparison": {},
+                "ranking": {}
+            }
+            
+            # 并发获取所有股票数据
+            stocks_data = list((await self._fetch_stocks(symbols)).values())
+            
+            if not stocks_data:
+                return {"error": "未获取到有效股票数据", "symbols": symbols}
+            
+            # 生成对比数据
+            comparative_data["comparison"] = self._generate_comparison(stocks_data)
+            comparative_data["ranking"] = self._generate_ranking(stocks_data)
+            
+            return comparative_data
+            
         except Exception as e:
             logger.error(f"获取对比分析失败: {e}")
             return {"error": str(e), "symbols": symbols}
@@ -216,15 +308,14 @@ class RAGIntegrationAdapter:
     async def _get_industry_overview(self, symbols: List[str]) -> Dict[str, Any]:
         """获取相关行业概览"""
         try:
-            async with httpx.AsyncClient() as client:
-                # 获取所有行业
-                response = await client.get(f"{self.stock_base_url}/stocks/industries/all")
-                if response.status_code == 200:
-                    industries = response.json()["data"]
-                    return {
-                        "total_industries": len(industries),
-                        "industries": industries[:10]  # 返回前10个行业
-                    }
+            # 获取所有行业
+            response = await self._client.get("/stocks/industries/all")
+            if response.status_code == 200:
+                industries = orjson.loads(response.content)["data"]
+                return {
+                    "total_industries": len(industries),
+                    "industries": industries[:10]  # 返回前10个行业
+                }
         except Exception as e:
             logger.warning(f"获取行业概览失败: {e}")
         
@@ -233,15 +324,14 @@ class RAGIntegrationAdapter:
     async def _get_market_summary(self) -> Dict[str, Any]:
         """获取市场摘要"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{self.stock_base_url}/stocks/stats/database")
-                if response.status_code == 200:
-                    stats = response.json()["data"]
-                    return {
-                        "total_stocks": stats.get("total_stocks", 0),
-                        "last_update": stats.get("latest_update"),
-                        "top_industries": stats.get("top_industries", [])[:5]
-                    }
+            response = await self._client.get("/stocks/stats/database")
+            if response.status_code == 200:
+                stats = orjson.loads(response.content)["data"]
+                return {
+                    "total_stocks": stats.get("total_stocks", 0),
+                    "last_update": stats.get("latest_update"),
+                    "top_industries": stats.get("top_industries", [])[:5]
+                }
         except Exception as e:
             logger.warning(f"获取市场摘要失败: {e}")
         
@@ -252,10 +342,16 @@ class RAGIntegrationAdapter:
         if not stocks_data:
             return {}
         
-        # 提取基本信息
-        market_caps = [s["basic_info"]["total_market_cap"] for s in stocks_data if s["basic_info"]["total_market_cap"] > 0]
-        pe_ratios = [s["basic_info"]["pe_ttm"] for s in stocks_data if s["basic_info"]["pe_ttm"] > 0]
-        roe_values = [s["basic_info"]["roe"] for s in stocks_data if s["basic_info"]["roe"] > 0]
+        # 单次遍历提取正值指标
+        market_caps, pe_ratios, roe_values = [], [], []
+        for stock in stocks_data:
+            basic = stock["basic_info"]
+            if basic["total_market_cap"] > 0:
+                market_caps.append(basic["total_market_cap"])
+            if basic["pe_ttm"] > 0:
+                pe_ratios.append(basic["pe_ttm"])
+            if basic["roe"] > 0:
+                roe_values.append(basic["roe"])
         
         return {
             "avg_market_cap": sum(market_caps) / len(market_caps) if market_caps else 0,
@@ -286,19 +382,19 @@ class RAGIntegrationAdapter:
         return comparison
     
     def _generate_ranking(self, stocks_data: List[Dict]) -> Dict[str, Any]:
-        """生成股票排名"""
+        """生成股票排名（各指标只取前 _RANKING_TOP_N 名）"""
         # 按市值排名
-        by_market_cap = sorted(
-            stocks_data, 
-            key=lambda x: x["basic_info"]["total_market_cap"], 
-            reverse=True
+        by_market_cap = heapq.nlargest(
+            _RANKING_TOP_N,
+            stocks_data,
+            key=lambda x: x["basic_info"]["total_market_cap"]
         )
         
         # 按ROE排名
-        by_roe = sorted(
-            [s for s in stocks_data if s["basic_info"]["roe"] > 0],
-            key=lambda x: x["basic_info"]["roe"],
-            reverse=True
+        by_roe = heapq.nlargest(
+            _RANKING_TOP_N,
+            (s for s in stocks_data if s["basic_info"]["roe"] > 0),
+            key=lambda x: x["basic_info"]["roe"]
         )
         
         return {
@@ -3,32 +3,81 @@
 """
 
 import asyncio
+import heapq
+import os
+import time
 import uuid
-from datetime import datetime, time
-from typing import Optional, Dict, Any
+from datetime import datetime
+from itertools import islice
+from operator import attrgetter
+from typing import Optional, Dict, Any, List, Set
 from loguru import logger
+from pymongo import UpdateOne
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
-from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_ERROR
+from apscheduler.events import (
+    EVENT_JOB_EXECUTED, EVENT_JOB_ERROR, EVENT_JOB_MISSED, EVENT_JOB_MAX_INSTANCES
+)
 import pytz
 
 from ..models.base import RefreshTask, SchedulerConfig, BatchProcessResult
 from ..core.database import db_manager
+from ..utils.cache import TTLCache
 from .stock_service import StockService
 
+# 读取历史任务时的投影：只取 RefreshTask 的字段
+_TASK_PROJECTION = {"_id": 0, **dict.fromkeys(RefreshTask.model_fields, 1)}
+
+# 任务按创建时间排序的键
+_task_created_time = attrgetter("created_time")
+
+# 定时刷新允许的最大延迟（秒）：事件循环繁忙或服务刚重启时，延迟在此范围内仍会执行
+_MISFIRE_GRACE_TIME = 3600
+
+# 任务状态写库间隔（秒）：同一任务在间隔内的多次更新合并为一次写入
+_TASK_FLUSH_INTERVAL = 1.0
+
+
+def _new_task_id(prefix: str) -> str:
+    """生成按时间有序且不冲突的任务ID（优先使用 uuid7，不可用时以纳秒时间戳加随机后缀代替）"""
+    if hasattr(uuid, "uuid7"):
+        return f"{prefix}_{uuid.uuid7().hex}"
+    return f"{prefix}_{time.time_ns():x}{os.urandom(3).hex()}"
+
 
 class StockRefreshScheduler:
     """股票数据刷新调度器"""
     
     def __init__(self, config: Optional[SchedulerConfig] = None):
         self.config = config or SchedulerConfig()
-        self.scheduler = AsyncIOScheduler(timezone=self.config.timezone)
+        # 时区和触发时间只解析一次，调度器与触发器共用
+        self._tz = pytz.timezone(self.config.timezone)
+        self._refresh_hour, self._refresh_minute = map(int, self.config.global_refresh_time.split(':'))
+        self._refresh_weekdays = ','.join(map(str, self.config.global_refresh_weekdays))
+        self.scheduler = AsyncIOScheduler(timezone=self._tz)
         self.stock_service = StockService()
         self._running_tasks: Dict[str, RefreshTask] = {}
         
+        # 全局刷新并发上限及后台任务句柄（持有强引用，任务结束后自动移除）
+        self._refresh_semaphore = asyncio.Semaphore(self.config.max_concurrent_tasks)
+        self._refresh_handles: Set[asyncio.Task] = set()
+        
+        # 调度器状态快照，仅在任务状态变化时失效，查询时按需重建
+        self._status_snapshot: Optional[Dict[str, Any]] = None
+        
+        # 任务写缓冲：task_id -> 最新任务状态，由后台协程定期批量写库
+        self._task_write_buffer: Dict[str, RefreshTask] = {}
+        # 正在写库的任务：写入完成前仍需能被查询到
+        self._inflight_tasks: Dict[str, RefreshTask] = {}
+        self._flush_handle: Optional[asyncio.Task] = None
+        
+        # 已结束任务的查询缓存：状态不再变化，轮询时无需每次查库
+        self._finished_task_cache = TTLCache(ttl=60, maxsize=1024)
+        
         # 设置调度器事件监听
         self.scheduler.add_listener(self._job_executed, EVENT_JOB_EXECUTED)
         self.scheduler.add_listener(self._job_error, EVENT_JOB_ERROR)
+        self.scheduler.add_listener(self._job_skipped, EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES)
         
     async def start(self):
         """启动调度器"""
@@ -42,6 +91,7 @@ class StockRefreshScheduler:
             
             # 启动调度器
             self.scheduler.start()
+            self._invalidate_status()
             logger.info("📅 股票刷新调度器启动成功")
             
         except Exception as e:
@@ -51,22 +101,37 @@ class StockRefreshScheduler:
     async def stop(self):
         """停止调度器"""
         try:
-            self.scheduler.shutdown(wait=False)
-            logger.info("📅 股票刷新调度器已停止")
+            # 调度器被禁用时 start() 未启动 APScheduler，此时 shutdown 会抛异常
+            if self.scheduler.running:
+                self.scheduler.shutdown(wait=False)
+            self._invalidate_status()
+            
+            # 取消仍在执行的后台全局刷新，其最终状态会在退出时写入缓冲
+            handles = list(self._refresh_handles)
+            for handle in handles:
+                handle.cancel()
+            await asyncio.gather(*handles, return_exceptions=True)
         except Exception as e:
             logger.error(f"❌ 调度器停止失败: {e}")
+        finally:
+            # 停止后台写库协程，并写入缓冲中剩余的任务状态
+            if self._flush_handle is not None:
+                self._flush_handle.cancel()
+                await asyncio.gather(self._flush_handle, return_exceptions=True)
+                self._flush_handle = None
+            await self._flush_tasks()
+            
+            await self.stock_service.aclose()
+            logger.info("📅 股票刷新调度器已停止")
     
     async def _schedule_global_refresh(self):
         """安排全局刷新任务"""
-        # 解析时间
-        hour, minute = map(int, self.config.global_refresh_time.split(':'))
-        
         # 创建 cron 触发器
         trigger = CronTrigger(
-            hour=hour,
-            minute=minute,
-            day_of_week=','.join(map(str, self.config.global_refresh_weekdays)),
-            timezone=pytz.timezone(self.config.timezone)
+            hour=self._refresh_hour,
+            minute=self._refresh_minute,
+            day_of_week=self._refresh_weekdays,
+            timezone=self._tz
         )
         
         # 添加任务
@@ -76,26 +141,57 @@ class StockRefreshScheduler:
             id='global_refresh',
             name='全局股票数据刷新',
             replace_existing=True,
-            max_instances=1
+            max_instances=1,
+            # 错过的多次触发合并为一次执行，且在宽限时间内补执行
+            coalesce=True,
+            misfire_grace_time=_MISFIRE_GRACE_TIME
         )
         
         logger.info(f"📅 已安排全局刷新任务: 每周 {self.config.global_refresh_weekdays} 的 {self.config.global_refresh_time}")
     
-    async def _execute_global_refresh(self):
-        """执行全局刷新"""
-        task_id = f"global_refresh_{uuid.uuid4().hex[:8]}"
+    def is_refresh_running(self) -> bool:
+        """全局刷新是否已达到并发上限（包括定时触发和已提交但尚未开始的任务）"""
+        return (
+            self._refresh_semaphore.locked()
+            or len(self._refresh_handles) >= self.config.max_concurrent_tasks
+        )
+    
+    def start_global_refresh(self) -> str:
+        """在后台启动全局刷新，返回任务ID"""
+        task_id = _new_task_id("manual_global_refresh")
+        handle = asyncio.create_task(self._execute_global_refresh(task_id))
+        self._refresh_handles.add(handle)
+        handle.add_done_callback(self._on_refresh_done)
+        self._invalidate_status()
+        return task_id
+    
+    def _on_refresh_done(self, handle: asyncio.Task):
+        """后台全局刷新结束回调"""
+        self._refresh_handles.discard(handle)
+        self._invalidate_status()
+    
+    async def _execute_global_refresh(self, task_id: Optional[str] = None):
+        """执行全局刷新（受 max_concurrent_tasks 限制）"""
+        async with self._refresh_semaphore:
+            await self._run_global_refresh(task_id or _new_task_id("global_refresh"))
+    
+    async def _run_global_refresh(self, task_id: str):
+        """全局刷新主流程"""
         task = RefreshTask(
             task_id=task_id,
             task_type="global_refresh",
             status="running",
             start_time=datetime.now()
         )
+        # 执行时长用单调时钟计算，不受系统时间调整影响
+        started = time.monotonic()
         
         try:
             logger.info(f"🔄 开始执行全局股票数据刷新 - 任务ID: {task_id}")
             
             # 保存任务到内存
             self._running_tasks[task_id] = task
+            self._invalidate_status()
             
             # 保存任务到数据库
             await self._save_task(task)
@@ -113,31 +209,35 @@ class StockRefreshScheduler:
             
             # 更新任务状态
             task.status = "completed"
-            task.end_time = datetime.now()
             task.result = result
             
-            # 计算执行时长
-            if task.start_time and task.end_time:
-                task.duration = (task.end_time - task.start_time).total_seconds()
-            
             logger.info(f"✅ 全局股票数据刷新完成 - 成功: {result.success}/{result.total}")
             
+        except asyncio.CancelledError:
+            logger.warning(f"⚠️ 全局股票数据刷新已取消 - 任务ID: {task_id}")
+            task.status = "failed"
+            task.error_message = "任务已取消"
+            raise
+            
         except Exception as e:
             logger.error(f"❌ 全局股票数据刷新失败: {e}")
             task.status = "failed"
-            task.end_time = datetime.now()
             task.error_message = str(e)
             
         finally:
+            task.end_time = datetime.now()
+            task.duration = time.monotonic() - started
+            
             # 更新数据库
             await self._save_task(task)
             
             # 从内存中移除任务
             self._running_tasks.pop(task_id, None)
+            self._invalidate_status()
     
     async def refresh_single_stock(self, stock_code: str) -> RefreshTask:
         """刷新单只股票数据"""
-        task_id = f"single_refresh_{stock_code}_{uuid.uuid4().hex[:8]}"
+        task_id = _new_task_id(f"single_refresh_{stock_code}")
         task = RefreshTask(
             task_id=task_id,
             task_type="single_refresh",
@@ -145,12 +245,14 @@ class StockRefreshScheduler:
             status="running",
             start_time=datetime.now()
         )
+        started = time.monotonic()
         
         try:
             logger.info(f"🔄 开始刷新股票 {stock_code} 数据 - 任务ID: {task_id}")
             
             # 保存任务到内存
             self._running_tasks[task_id] = task
+            self._invalidate_status()
             
             # 保存任务到数据库
             await self._save_task(task)
@@ -190,91 +292,148 @@ class StockRefreshScheduler:
             
         finally:
             task.end_time = datetime.now()
-            
-            # 计算执行时长
-            if task.start_time and task.end_time:
-                task.duration = (task.end_time - task.start_time).total_seconds()
+            task.duration = time.monotonic() - started
             
             # 更新数据库
             await self._save_task(task)
             
             # 从内存中移除任务
             self._running_tasks.pop(task_id, None)
+            self._invalidate_status()
         
         return task
     
     async def get_task_status(self, task_id: str) -> Optional[RefreshTask]:
         """获取任务状态"""
-        # 先查内存中的运行任务
+        # 先查内存中的运行任务和尚未写库的任务
         if task_id in self._running_tasks:
             return self._running_tasks[task_id]
+        if task_id in self._task_write_buffer:
+            return self._task_write_buffer[task_id]
+        if task_id in self._inflight_tasks:
+            return self._inflight_tasks[task_id]
         
-        # 再查数据库中的历史任务
+        cached = self._finished_task_cache.get(task_id)
+        if cached is not None:
+            return cached
+        
+        # 再查数据库中的历史任务（只取 RefreshTask 需要的字段）
         if db_manager.db is not None:
-            task_data = db_manager.tasks_collection.find_one({"task_id": task_id})
+            task_data = await db_manager.tasks_collection.find_one({"task_id": task_id}, _TASK_PROJECTION)
             if task_data:
-                if "_id" in task_data: # 确保 _id 字段在从数据库获取时被处理
-                    task_data["_id"] = str(task_data["_id"])
-                return RefreshTask(**task_data)
+                task = RefreshTask.model_validate(task_data)
+                if task.status in ("completed", "failed"):
+                    self._finished_task_cache.set(task_id, task)
+                return task
         
         return None
     
     async def get_recent_tasks(self, limit: int = 10) -> list[RefreshTask]:
         """获取最近的任务列表"""
-        tasks = []
-        
-        # 添加运行中的任务
-        for task in self._running_tasks.values():
-            tasks.append(task)
+        # 运行中的任务和尚未写库的任务（先取快照，数量很少，单独排序）
+        pending = {**self._inflight_tasks, **self._task_write_buffer, **self._running_tasks}
+        in_memory = sorted(pending.values(), key=_task_created_time, reverse=True)
         
-        # 从数据库获取历史任务
+        task_docs: List[Dict[str, Any]] = []
         if db_manager.db is not None:
-            cursor = db_manager.tasks_collection.find().sort("created_time", -1).limit(limit)
-            for task_data in cursor:
-                # 避免重复添加运行中的任务
-                if task_data["task_id"] not in self._running_tasks:
-                    if "_id" in task_data: # 确保 _id 字段在从数据库获取时被处理
-                        task_data["_id"] = str(task_data["_id"])
-                    tasks.append(RefreshTask(**task_data))
-        
-        # 按创建时间排序
-        tasks.sort(key=lambda x: x.created_time, reverse=True)
+            # 单批次拉取全部结果，避免游标多次往返；按 created_time 索引倒序遍历，
+            # 只返回 RefreshTask 需要的字段（不传回 _id）
+            cursor = (
+                db_manager.tasks_collection.find({}, _TASK_PROJECTION)
+                .sort("created_time", -1)
+                .hint([("created_time", -1)])
+                .limit(limit)
+                .batch_size(limit)
+            )
+            task_docs = await cursor.to_list(length=limit)
         
-        return tasks[:limit]
+        # 数据库结果已按创建时间倒序，与内存任务归并即可，无需整体排序；
+        # 跳过内存中已有的任务，且只校验最终返回的文档
+        history = (
+            RefreshTask.model_validate(task_data)
+            for task_data in task_docs
+            if task_data["task_id"] not in pending
+        )
+        merged = heapq.merge(in_memory, history, key=_task_created_time, reverse=True)
+        return list(islice(merged, limit))
     
     async def _save_task(self, task: RefreshTask):
-        """保存任务到数据库"""
+        """保存任务到写缓冲，由后台协程每秒批量写入数据库"""
+        if db_manager.db is None:
+            return
+        
+        self._task_write_buffer[task.task_id] = task
+        if self._flush_handle is None or self._flush_handle.done():
+            self._flush_handle = asyncio.create_task(self._flush_loop())
+    
+    async def _flush_loop(self):
+        """定期写入缓冲中的任务状态，缓冲清空后退出"""
+        while self._task_write_buffer:
+            await asyncio.sleep(_TASK_FLUSH_INTERVAL)
+            await self._flush_tasks()
+    
+    async def _flush_tasks(self):
+        """以一次无序 bulk_write 写入缓冲中的任务状态"""
+        if not self._task_write_buffer or db_manager.db is None:
+            return
+        
+        pending, self._task_write_buffer = self._task_write_buffer, {}
+        self._inflight_tasks.update(pending)
+        ops = [
+            UpdateOne({"task_id": task_id}, {"$set": task.model_dump()}, upsert=True)
+            for task_id, task in pending.items()
+        ]
+        
         try:
-            if db_manager.db is None:
-                return
-            
-            # 转换为字典并处理特殊字段
-            task_dict = task.model_dump()
-            
-            # 使用 upsert 操作
-            db_manager.tasks_collection.update_one(
-                {"task_id": task.task_id},
-                {"$set": task_dict},
-                upsert=True
-            )
-            
-        except Exception as e:
-            logger.error(f"保存任务 {task.task_id} 到数据库失败: {e}")
+            await db_manager.tasks_collection.bulk_write(ops, ordered=False)
+        except BaseException as e:
+            # 写入失败或被取消的任务放回缓冲，下次重试（期间有更新的以新状态为准）
+            for task_id, task in pending.items():
+                self._task_write_buffer.setdefault(task_id, task)
+            if not isinstance(e, Exception):
+                raise
+            logger.error(f"保存 {len(ops)} 个任务到数据库失败: {e}")
+        finally:
+            # 写入结束（成功或已放回缓冲）后才从写入中集合移除
+            for task_id, task in pending.items():
+                if self._inflight_tasks.get(task_id) is task:
+                    del self._inflight_tasks[task_id]
     
     def _job_executed(self, event):
         """任务执行完成事件"""
         logger.debug(f"调度任务执行完成: {event.job_id}")
+        self._invalidate_status()
     
     def _job_error(self, event):
         """任务执行错误事件"""
         logger.error(f"调度任务执行错误: {event.job_id}, 错误: {event.exception}")
+        self._invalidate_status()
+    
+    def _job_skipped(self, event):
+        """任务错过执行时间或上一次执行尚未结束时跳过本次触发"""
+        if event.code == EVENT_JOB_MISSED:
+            logger.warning(f"调度任务 {event.job_id} 超过宽限时间未执行，已跳过: 计划时间 {event.scheduled_run_time}")
+        else:
+            logger.warning(f"调度任务 {event.job_id} 上一次执行尚未结束，已跳过本次触发: 计划时间 {event.scheduled_run_time}")
+        self._invalidate_status()
+    
+    def _invalidate_status(self):
+        """任务状态变化时使状态快照失效"""
+        self._status_snapshot = None
     
     def get_scheduler_status(self) -> Dict[str, Any]:
-        """获取调度器状态"""
+        """获取调度器状态（状态未变化时直接返回快照）"""
+        if self._status_snapshot is None:
+            self._status_snapshot = self._build_status()
+        return self._status_snapshot
+    
+    def _build_status(self) -> Dict[str, Any]:
+        """构建调度器状态"""
         return {
             "running": self.scheduler.running if self.scheduler else False,
             "config": self.config.model_dump(),
             "running_tasks": len(self._running_tasks),
+            "active_global_refreshes": len(self._refresh_handles),
             "next_global_refresh": self._get_next_run_time("global_refresh"),
             "jobs": [
                 {
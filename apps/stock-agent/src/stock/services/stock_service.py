@@ -2,17 +2,97 @@
 股票数据业务服务
 """
 
+import asyncio
 import time
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 from loguru import logger
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 
+from ..core.config import settings
 from ..core.database import db_manager
 from ..models.base import StockQuery, BatchProcessResult
+from ..utils.cache import TTLCache
 from ..utils.helpers import prepare_mongodb_document
 from .data_fetcher import StockDataFetcher
 
 
+# StockQuery 过滤字段定义: (查询字段, MongoDB 字段, 操作符)
+_QUERY_FILTER_FIELDS: Tuple[Tuple[str, str, str], ...] = (
+    ("codes", "stock_code", "$in"),
+    ("industries", "basic_info.industry", "$in"),
+    ("min_market_cap", "basic_info.total_market_cap", "$gte"),
+    ("max_market_cap", "basic_info.total_market_cap", "$lte"),
+    ("min_pe", "basic_info.pe_ttm", "$gte"),
+    ("max_pe", "basic_info.pe_ttm", "$lte"),
+)
+
+# 代码/行业列表缓存（供 API 层使用）：任何股票数据写入后清空，
+# 调度器刷新、手动刷新和 /fetch 接口都经由本服务写库，无论哪个实例写入都会失效
+stock_list_cache = TTLCache(ttl=3600, maxsize=256)
+
+# 支持按日期范围过滤的K线字段
+_KLINE_FIELDS = ("kline_day", "kline_month")
+
+
+def _build_mongo_query(query: StockQuery) -> Dict[str, Any]:
+    """将 StockQuery 转换为 MongoDB 查询条件（单次遍历过滤字段表）"""
+    mongo_query: Dict[str, Any] = {}
+    for attr, field, op in _QUERY_FILTER_FIELDS:
+        # 列表条件为空时不生效，数值条件为 None 时不生效
+        if (value := getattr(query, attr)) is None or value == []:
+            continue
+        if op == "$in":
+            # 保序去重，避免 $in 重复匹配
+            value = list(dict.fromkeys(value))
+        # 同一字段的上下限合并到同一个条件字典中
+        mongo_query.setdefault(field, {})[op] = value
+    return mongo_query
+
+
+def _kline_date_filter(field: str, start_str: Optional[str], end_str: Optional[str]) -> Dict[str, Any]:
+    """构造在 MongoDB 端按日期范围过滤K线数组的 $filter 表达式（缺少日期的条目被丢弃）"""
+    conditions: List[Dict[str, Any]] = [{"$eq": [{"$type": "$$k.date"}, "string"]}]
+    if start_str:
+        conditions.append({"$gte": ["$$k.date", start_str]})
+    if end_str:
+        conditions.append({"$lte": ["$$k.date", end_str]})
+    return {"$filter": {"input": f"${field}", "as": "k", "cond": {"$and": conditions}}}
+
+
+def _build_kline_pipeline(mongo_query: Dict[str, Any], query: StockQuery,
+                          projection: Optional[Dict[str, int]]) -> List[Dict[str, Any]]:
+    """
+    构造带K线日期过滤的聚合管道，只返回日期范围内的K线条目，
+    避免把完整K线数组传回应用后再过滤
+    """
+    start_str = query.start_date.strftime("%Y-%m-%d") if query.start_date else None
+    end_str = query.end_date.strftime("%Y-%m-%d") if query.end_date else None
+    
+    pipeline: List[Dict[str, Any]] = [{"$match": mongo_query}]
+    if projection:
+        pipeline.append({"$project": projection})
+        kline_fields = [
+            field for field in _KLINE_FIELDS
+            if any(key == field or key.startswith(field + ".") for key in projection)
+        ]
+    else:
+        kline_fields = list(_KLINE_FIELDS)
+    
+    if kline_fields:
+        # 字段不存在的文档保持原样，不额外补出空数组
+        pipeline.append({"$set": {
+            field: {"$cond": [
+                {"$isArray": f"${field}"},
+                _kline_date_filter(field, start_str, end_str),
+                "$$REMOVE"
+            ]}
+            for field in kline_fields
+        }})
+    return pipeline
+
+
 class StockService:
     """股票数据服务"""
     
@@ -21,7 +101,50 @@ class StockService:
         
     async def get_all_stock_codes(self) -> List[str]:
         """获取所有股票代码"""
-        return self.data_fetcher.get_all_stock_codes()
+        return await self.data_fetcher.get_all_stock_codes()
+    
+    async def aclose(self):
+        """释放数据获取器的HTTP连接池"""
+        await self.data_fetcher.aclose()
+    
+    async def _fetch_stock_update(self, stock_code: str, refresh_holders: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        抓取单只股票数据并构造 MongoDB $set 内容，基本信息无效时返回 None
+        :param stock_code: 股票代码
+        :param refresh_holders: 是否刷新股东信息
+        """
+        logger.debug(f"开始处理股票 {stock_code} (刷新股东: {refresh_holders})")
+
+        # 并发获取基本信息和K线数据
+        basic_info, kline_day, kline_month = await asyncio.gather(
+            self.data_fetcher.get_stock_basic_info(stock_code),
+            self.data_fetcher.get_kline_data(stock_code, "day", 22),
+            self.data_fetcher.get_kline_data(stock_code, "month", 24)
+        )
+        
+        if not basic_info or not basic_info.get("stock_name"):
+            logger.warning(f"未能获取股票 {stock_code} 的有效基本信息，终止保存。")
+            return None
+        
+        logger.debug(f"✅ 基本信息获取完成: {basic_info['stock_name']}")
+        logger.debug(f"✅ 日K线获取完成: {len(kline_day)} 条")
+        logger.debug(f"✅ 月K线获取完成: {len(kline_month)} 条")
+        
+        # 准备要更新的数据（K线数值在获取时已清洗为有限值，无需再逐条遍历）
+        update_data = {
+            "basic_info": prepare_mongodb_document(basic_info),
+            "kline_day": kline_day,
+            "kline_month": kline_month,
+            "update_time": datetime.now()
+        }
+
+        # 根据标志决定是否刷新股东信息
+        if refresh_holders:
+            holders = await self.data_fetcher.get_top_holders(stock_code)
+            logger.debug(f"✅ 股东信息获取完成: {len(holders)} 条")
+            update_data["holders"] = prepare_mongodb_document(holders)
+        
+        return update_data
     
     async def fetch_and_save_stock(self, stock_code: str, refresh_holders: bool = True) -> bool:
         """
@@ -30,49 +153,21 @@ class StockService:
         :param refresh_holders: 是否刷新股东信息
         """
         try:
-            logger.info(f"开始处理股票 {stock_code} (刷新股东: {refresh_holders})")
-
-            # 获取基本信息
-            basic_info = self.data_fetcher.get_stock_basic_info(stock_code)
-            
-            if not basic_info or not basic_info.get("stock_name"):
-                logger.warning(f"未能获取股票 {stock_code} 的有效基本信息，终止保存。")
+            update_data = await self._fetch_stock_update(stock_code, refresh_holders)
+            if update_data is None:
                 return False
-            
-            logger.info(f"✅ 基本信息获取完成: {basic_info['stock_name']}")
-
-            # 获取K线数据
-            kline_day = self.data_fetcher.get_kline_data(stock_code, "day", 22)
-            logger.info(f"✅ 日K线获取完成: {len(kline_day)} 条")
-            kline_month = self.data_fetcher.get_kline_data(stock_code, "month", 24)
-            logger.info(f"✅ 月K线获取完成: {len(kline_month)} 条")
-            
-            # 准备要更新的数据
-            update_data = {
-                "basic_info": prepare_mongodb_document(basic_info),
-                "kline_day": prepare_mongodb_document(kline_day),
-                "kline_month": prepare_mongodb_document(kline_month),
-                "update_time": datetime.now()
-            }
-
-            # 根据标志决定是否刷新股东信息
-            if refresh_holders:
-                holders = self.data_fetcher.get_top_holders(stock_code)
-                logger.info(f"✅ 股东信息获取完成: {len(holders)} 条")
-                update_data["holders"] = prepare_mongodb_document(holders)
-            
-            # # 添加延迟, data_fetcher中已有延迟，此处无需重复
-            # time.sleep(0.5)
 
             # 保存到数据库
             if db_manager.db is None:
                 raise RuntimeError("数据库未连接")
             
-            db_manager.stocks_collection.update_one(
+            await db_manager.stocks_collection.update_one(
                 {"stock_code": stock_code},
                 {"$set": update_data},
                 upsert=True
             )
+            # 可能写入了新的股票或行业，列表需重新加载
+            stock_list_cache.clear()
 
             logger.info(f"✅ 股票 {stock_code} 数据保存成功")
             return True
@@ -81,8 +176,48 @@ class StockService:
             logger.error(f"处理股票 {stock_code} 时发生错误: {e}")
             return False
     
-    async def batch_fetch_stocks(self, stock_codes: List[str], batch_size: int = 50) -> BatchProcessResult:
-        """批量获取股票数据"""
+    async def _bulk_save_stocks(self, updates: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """
+        以无序 bulk_write 批量保存股票数据，返回写入失败的股票代码
+        :param updates: (股票代码, $set 内容) 列表
+        """
+        if not updates:
+            return []
+        
+        ops = [
+            UpdateOne({"stock_code": stock_code}, {"$set": update_data}, upsert=True)
+            for stock_code, update_data in updates
+        ]
+        
+        try:
+            await db_manager.stocks_collection.bulk_write(ops, ordered=False)
+            return []
+        except BulkWriteError as bwe:
+            # writeErrors 中的 index 对应 ops 的下标
+            failed = [updates[err["index"]][0] for err in bwe.details.get("writeErrors", [])]
+            logger.error(f"批量保存部分失败: {len(failed)}/{len(ops)}")
+            return failed
+        finally:
+            # 无序写入部分失败时其余文档仍已写入，同样需要失效列表缓存
+            stock_list_cache.clear()
+    
+    async def batch_fetch_stocks(
+        self,
+        stock_codes: List[str],
+        batch_size: int = 50,
+        max_concurrency: Optional[int] = None
+    ) -> BatchProcessResult:
+        """
+        批量获取股票数据
+        
+        固定数量的工作协程从队列中持续取股票抓取，慢请求只占用一个工作协程，
+        不会拖住其他股票；抓取结果每累积 batch_size 条即一次 bulk_write 写入
+        
+        Args:
+            stock_codes: 股票代码列表
+            batch_size: 每次批量写入的股票数
+            max_concurrency: 同时抓取的股票数上限（工作协程数），默认取配置 max_concurrency
+        """
         if not stock_codes:
             return BatchProcessResult(
                 total=0,
@@ -93,29 +228,72 @@ class StockService:
                 failed_codes=[]
             )
         
+        if db_manager.db is None:
+            raise RuntimeError("数据库未连接")
+        
         total = len(stock_codes)
-        success_count = 0
         processed_codes = []
         failed_codes = []
         start_time = time.time()
         
-        # 分批处理
-        batches = [stock_codes[i:i+batch_size] for i in range(0, len(stock_codes), batch_size)]
+        queue: asyncio.Queue = asyncio.Queue()
+        for stock_code in stock_codes:
+            queue.put_nowait(stock_code)
+        
+        # 待写入的抓取结果，达到 batch_size 时整体取出写库
+        pending: List[Tuple[str, Dict[str, Any]]] = []
         
-        for i, batch in enumerate(batches):
-            logger.info(f"处理批次 {i+1}/{len(batches)} (共 {len(batch)} 只股票)")
+        async def flush() -> None:
+            nonlocal pending
+            updates, pending = pending, []
+            if not updates:
+                return
+            
+            try:
+                write_failed = set(await self._bulk_save_stocks(updates))
+            except Exception as e:
+                logger.error(f"批量保存 {len(updates)} 只股票失败: {e}")
+                write_failed = {stock_code for stock_code, _ in updates}
             
-            for stock_code in batch:
+            for stock_code, _ in updates:
+                if stock_code in write_failed:
+                    failed_codes.append(stock_code)
+                else:
+                    processed_codes.append(stock_code)
+            
+            # 单只股票的处理细节只记 DEBUG 日志，每次写库汇总一条 INFO
+            logger.info(
+                f"进度 {len(processed_codes) + len(failed_codes)}/{total}: "
+                f"成功 {len(processed_codes)}, 已用时 {time.time() - start_time:.1f}秒"
+            )
+        
+        async def worker() -> None:
+            while True:
+                try:
+                    stock_code = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                
                 try:
-                    if await self.fetch_and_save_stock(stock_code):
-                        success_count += 1
-                        processed_codes.append(stock_code)
-                    else:
-                        failed_codes.append(stock_code)
+                    update_data = await self._fetch_stock_update(stock_code)
                 except Exception as e:
                     logger.error(f"处理股票 {stock_code} 异常: {e}")
+                    update_data = None
+                
+                if update_data is None:
                     failed_codes.append(stock_code)
+                    continue
+                
+                pending.append((stock_code, update_data))
+                if len(pending) >= batch_size:
+                    await flush()
+        
+        # 工作协程数即抓取并发上限，避免触发数据源限流
+        concurrency = min(max_concurrency or settings.data.max_concurrency, total)
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        await flush()
         
+        success_count = len(processed_codes)
         success_rate = success_count / total if total > 0 else 0
         total_time = time.time() - start_time
         
@@ -130,70 +308,70 @@ class StockService:
             failed_codes=failed_codes
         )
     
-    async def query_stocks(self, query: StockQuery) -> List[Dict[str, Any]]:
-        """查询股票数据"""
+    async def query_stocks(self, query: StockQuery,
+                           projection: Optional[Dict[str, int]] = None) -> List[Dict[str, Any]]:
+        """
+        查询股票数据
+        :param query: 查询条件
+        :param projection: MongoDB 字段投影，为空时返回完整文档
+        """
         if db_manager.db is None:
             raise RuntimeError("数据库未连接")
         
-        # 构建MongoDB查询条件
-        mongo_query = {}
-        
-        if query.codes:
-            mongo_query["stock_code"] = {"$in": query.codes}
+        # 执行查询（指定时间范围时K线在 MongoDB 端过滤）
+        results = await self._find_stocks(query, projection).to_list(length=None)
         
-        if query.industries:
-            mongo_query["basic_info.industry"] = {"$in": query.industries}
+        self._postprocess_results(results)
         
-        if query.min_market_cap is not None:
-            mongo_query["basic_info.total_market_cap"] = {"$gte": query.min_market_cap}
-        
-        if query.max_market_cap is not None:
-            if "basic_info.total_market_cap" in mongo_query:
-                mongo_query["basic_info.total_market_cap"]["$lte"] = query.max_market_cap
-            else:
-                mongo_query["basic_info.total_market_cap"] = {"$lte": query.max_market_cap}
-        
-        if query.min_pe is not None:
-            mongo_query["basic_info.pe_ttm"] = {"$gte": query.min_pe}
+        return results
+    
+    async def iter_stocks(self, query: StockQuery,
+                          projection: Optional[Dict[str, int]] = None,
+                          batch_size: int = 500) -> AsyncIterator[Dict[str, Any]]:
+        """
+        流式查询股票数据，逐条产出后处理后的文档
+        :param query: 查询条件
+        :param projection: MongoDB 字段投影，为空时返回完整文档
+        :param batch_size: 游标每批从 MongoDB 拉取的文档数
+        """
+        if db_manager.db is None:
+            raise RuntimeError("数据库未连接")
         
-        if query.max_pe is not None:
-            if "basic_info.pe_ttm" in mongo_query:
-                mongo_query["basic_info.pe_ttm"]["$lte"] = query.max_pe
-            else:
-                mongo_query["basic_info.pe_ttm"] = {"$lte": query.max_pe}
+        async for doc in self._find_stocks(query, projection, batch_size):
+            self._postprocess_results([doc])
+            yield doc
+    
+    def _find_stocks(self, query: StockQuery, projection: Optional[Dict[str, int]],
+                     batch_size: Optional[int] = None):
+        """
+        按查询条件返回 MongoDB 游标
         
-        # 执行查询
-        results = list(db_manager.stocks_collection.find(mongo_query))
+        未指定时间范围时使用普通 find；指定时间范围时改用聚合，
+        在 MongoDB 端用 $filter 截取K线数组
+        """
+        mongo_query = _build_mongo_query(query)
         
-        # 如果指定了时间范围，过滤K线数据
-        if query.start_date or query.end_date:
-            start_str = query.start_date.strftime("%Y-%m-%d") if query.start_date else None
-            end_str = query.end_date.strftime("%Y-%m-%d") if query.end_date else None
-            
-            for result in results:
-                if "kline_day" in result:
-                    result["kline_day"] = self._filter_kline_by_date(
-                        result["kline_day"], start_str, end_str
-                    )
-                
-                if "kline_month" in result:
-                    result["kline_month"] = self._filter_kline_by_date(
-                        result["kline_month"], start_str, end_str
-                    )
+        if not (query.start_date or query.end_date):
+            cursor = db_manager.stocks_collection.find(mongo_query, projection)
+            return cursor.batch_size(batch_size) if batch_size else cursor
         
-        # 序列化ObjectId
+        pipeline = _build_kline_pipeline(mongo_query, query, projection)
+        if batch_size:
+            return db_manager.stocks_collection.aggregate(pipeline, batchSize=batch_size)
+        return db_manager.stocks_collection.aggregate(pipeline)
+    
+    def _postprocess_results(self, results: List[Dict[str, Any]]) -> None:
+        """序列化 ObjectId（原地修改）"""
         for result in results:
             if "_id" in result:
                 result["_id"] = str(result["_id"])
-        
-        return results
     
     async def get_stock_by_code(self, stock_code: str) -> Optional[Dict[str, Any]]:
         """根据代码获取单只股票数据"""
         if db_manager.db is None:
             raise RuntimeError("数据库未连接")
         
-        result = db_manager.stocks_collection.find_one({"stock_code": stock_code})
+        result = await db_manager.stocks_collection.find_one({"stock_code": stock_code})
         
         # 序列化ObjectId
         if result and "_id" in result:
@@ -201,67 +379,64 @@ class StockService:
             
         return result
     
+    async def get_stocks_by_codes(self, stock_codes: List[str]) -> Dict[str, Dict[str, Any]]:
+        """根据代码批量获取股票数据，返回 {股票代码: 数据}（不存在的代码不包含在结果中）"""
+        if db_manager.db is None:
+            raise RuntimeError("数据库未连接")
+        
+        cursor = db_manager.stocks_collection.find({"stock_code": {"$in": stock_codes}})
+        
+        results = {}
+        async for doc in cursor:
+            doc["_id"] = str(doc["_id"])
+            results[doc["stock_code"]] = doc
+        return results
+    
     async def get_industries(self) -> List[str]:
         """获取所有行业列表"""
         if db_manager.db is None:
             raise RuntimeError("数据库未连接")
         
-        return db_manager.stocks_collection.distinct("basic_info.industry")
+        return await db_manager.stocks_collection.distinct("basic_info.industry")
     
     async def get_stocks_by_industry(self, industry: str) -> List[str]:
         """获取指定行业的股票代码"""
         if db_manager.db is None:
             raise RuntimeError("数据库未连接")
         
-        results = db_manager.stocks_collection.find(
-            {"basic_info.industry": industry},
-            {"stock_code": 1, "_id": 0}
+        # 在服务端完成去重提取，可由 (行业, 代码) 索引直接覆盖，无需传回文档
+        return await db_manager.stocks_collection.distinct(
+            "stock_code", {"basic_info.industry": industry}
         )
-        
-        return [result["stock_code"] for result in results]
     
     async def get_database_stats(self) -> Dict[str, Any]:
         """获取数据库统计信息"""
         if db_manager.db is None:
             raise RuntimeError("数据库未连接")
         
-        total_stocks = db_manager.stocks_collection.count_documents({})
-        
-        # 按行业统计
+        # 单次聚合完成总数、最近更新时间和行业统计，只扫描一次集合
         pipeline = [
-            {"$group": {"_id": "$basic_info.industry", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}},
-            {"$limit": 10}
+            {"$facet": {
+                "summary": [
+                    {"$group": {
+                        "_id": None,
+                        "total_stocks": {"$sum": 1},
+                        "latest_update": {"$max": "$update_time"}
+                    }}
+                ],
+                "top_industries": [
+                    {"$group": {"_id": "$basic_info.industry", "count": {"$sum": 1}}},
+                    {"$sort": {"count": -1}},
+                    {"$limit": 10}
+                ]
+            }}
         ]
-        industry_stats = list(db_manager.stocks_collection.aggregate(pipeline))
-        
-        # 最近更新时间
-        latest_update = db_manager.stocks_collection.find_one(
-            {}, {"update_time": 1}, sort=[("update_time", -1)]
-        )
+        facets = await db_manager.stocks_collection.aggregate(pipeline).to_list(length=1)
+        stats = facets[0] if facets else {}
+        summary = stats.get("summary") or [{}]
         
         return {
-            "total_stocks": total_stocks,
-            "top_industries": industry_stats,
-            "latest_update": latest_update.get("update_time") if latest_update else None
+            "total_stocks": summary[0].get("total_stocks", 0),
+            "top_industries": stats.get("top_industries", []),
+            "latest_update": summary[0].get("latest_update")
         }
-    
-    def _filter_kline_by_date(self, kline_data: List[Dict], start_date: Optional[str], 
-                             end_date: Optional[str]) -> List[Dict]:
-        """根据日期范围过滤K线数据"""
-        filtered_data = []
-        
-        for kline in kline_data:
-            if "date" not in kline:
-                continue
-                
-            # 检查日期是否在范围内
-            if start_date and kline["date"] < start_date:
-                continue
-            if end_date and kline["date"] > end_date:
-                continue
-                
-            filtered_data.append(kline)
-        
-        return filtered_data
-
@@ -0,0 +1,53 @@
+"""
+进程内 TTL 缓存
+"""
+
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """简易进程内 TTL 缓存
+
+    条目超过 ttl 秒后失效；超过 maxsize 时淘汰最早写入的条目。
+    仅适用于单进程内对低频变化数据的缓存；读写加锁，可在线程池中使用。
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 128):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        # key -> (value, 过期时间)
+        self._store: Dict[Hashable, Tuple[Any, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """获取缓存值，不存在或已过期时返回 None"""
+        with self._lock:
+            item = self._store.get(key)
+            if item is None:
+                return None
+            value, expire_at = item
+            if expire_at < time.monotonic():
+                self._store.pop(key, None)
+                return None
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """写入缓存值"""
+        with self._lock:
+            self._store.pop(key, None)
+            if len(self._store) >= self.maxsize:
+                # 字典保持插入顺序，第一个即最早写入的条目
+                self._store.pop(next(iter(self._store)))
+            self._store[key] = (value, time.monotonic() + self.ttl)
+
+    def invalidate(self, key: Hashable) -> None:
+        """删除指定缓存"""
+        with self._lock:
+            self._store.pop(key, None)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._store.clear()
@@ -2,12 +2,57 @@
 工具函数
 """
 
+import re
+import sys
 from decimal import Decimal
-from typing import Any, Union
+from math import isfinite
+from typing import Any, List, Union
+import numpy as np
+import pandas as pd
 from loguru import logger
 
 
-def safe_convert_value(value: Any, divisor: Union[int, float] = 1, default: Union[int, float] = 0) -> float:
+# 表示缺失的数值文本（东方财富缺失字段返回 "-"）
+_EMPTY_VALUES = frozenset(("", "N/A", "-", "--"))
+
+# prepare_mongodb_document 按确切类型分派用：需要下钻的容器、无需处理的常见叶子
+_PLAIN_CONTAINER_TYPES = frozenset((dict, list))
+_PLAIN_LEAF_TYPES = frozenset((str, int, bool, type(None)))
+
+# 按代码首字符查表确定市场：0/3 开头为深市，其余为沪市
+_MARKET_BY_FIRST_CHAR = {"0": "sz", "3": "sz"}
+# 东方财富 secid 市场前缀：深市 0，沪市 1
+_SECID_PREFIX_BY_FIRST_CHAR = {"0": "0.", "3": "0."}
+
+# 股东类型判定规则（按优先级排列）: (名称关键字正则, 股东类型)
+# 类型字符串统一驻留，下游按类型分组/计数时可直接按对象身份比较
+HOLDER_TYPE_RULES = tuple(
+    (pattern, sys.intern(holder_type))
+    for pattern, holder_type in (
+        ("基金", "基金"),
+        ("证券|机构", "机构"),
+        ("银行", "银行"),
+        ("保险", "保险"),
+        ("社保", "社保"),
+        ("个人", "个人"),
+    )
+)
+_HOLDER_TYPE_OTHER = sys.intern("其他")
+# 规则序号 -> 股东类型，末位为未命中任何规则时的“其他”
+_HOLDER_TYPE_BY_RANK = tuple(holder_type for _, holder_type in HOLDER_TYPE_RULES) + (_HOLDER_TYPE_OTHER,)
+
+# 关键字 -> 规则序号（序号越小优先级越高）
+_HOLDER_KEYWORD_RANK = {
+    keyword: rank
+    for rank, (pattern, _) in enumerate(HOLDER_TYPE_RULES)
+    for keyword in pattern.split("|")
+}
+# 前瞻匹配，关键字相互重叠时（如“社保险”）也能全部找出
+_HOLDER_KEYWORD_RE = re.compile(f"(?=({'|'.join(_HOLDER_KEYWORD_RANK)}))")
+
+
+def safe_convert_value(value: Any, divisor: Union[int, float] = 1, default: Union[int, float] = 0,
+                       high_precision: bool = False) -> float:
     """
     安全转换数值，处理大数值和空值
     
@@ -15,25 +60,29 @@ def safe_convert_value(value: Any, divisor: Union[int, float] = 1, default: Unio
         value: 待转换的值
         divisor: 除数
         default: 默认值
+        high_precision: 是否使用 Decimal 做除法（默认直接按浮点数计算）
         
     Returns:
         转换后的浮点数
     """
-    if value is None or value == '' or value == 'N/A':
+    if value is None:
+        return default
+    
+    # 快速路径：接口返回的数值字段直接计算
+    value_type = type(value)
+    if (value_type is int or value_type is float) and not high_precision:
+        return value / divisor
+    
+    text = (value if value_type is str else str(value)).strip()
+    if text in _EMPTY_VALUES:
         return default
     
     try:
-        # 处理科学计数法
-        if isinstance(value, str) and 'E' in value.upper():
-            value = float(value)
-        
-        # 转换为Decimal处理大数值
-        decimal_value = Decimal(str(value))
-        result = decimal_value / Decimal(str(divisor))
-        
-        # 转换为float但保留精度
-        return float(result)
-    except (ValueError, TypeError, Exception) as e:
+        if high_precision:
+            return float(Decimal(text) / Decimal(str(divisor)))
+        # float 可直接解析科学计数法
+        return float(text) / divisor
+    except (ValueError, TypeError, ArithmeticError) as e:
         logger.warning(f"数值转换失败: {value} -> {default}, 错误: {e}")
         return default
 
@@ -42,21 +91,41 @@ def prepare_mongodb_document(data: Any) -> Any:
     """
     准备MongoDB文档，处理特殊数据类型
     
+    将无穷大和NaN替换为 0；字典和列表原地修改（迭代遍历，不复制嵌套结构）
+    
     Args:
         data: 待处理的数据
         
     Returns:
         处理后的数据
     """
-    if isinstance(data, dict):
-        return {k: prepare_mongodb_document(v) for k, v in data.items()}
-    elif isinstance(data, list):
-        return [prepare_mongodb_document(item) for item in data]
-    elif isinstance(data, float) and (data == float('inf') or data == float('-inf') or data != data):
-        # 处理无穷大和NaN
-        return 0
-    else:
-        return data
+    if type(data) not in _PLAIN_CONTAINER_TYPES:
+        if isinstance(data, float):
+            return data if isfinite(data) else 0
+        if not isinstance(data, (dict, list)):
+            return data
+    
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        items = node.items() if isinstance(node, dict) else enumerate(node)
+        for key, value in items:
+            # 先按确切类型分派（一次指针比较），子类（如 numpy.float64）再回退到 isinstance
+            value_type = type(value)
+            if value_type is float:
+                if not isfinite(value):
+                    # 只替换已有键/下标的值，不改变容器大小，遍历中修改是安全的
+                    node[key] = 0
+            elif value_type in _PLAIN_CONTAINER_TYPES:
+                stack.append(value)
+            elif value_type in _PLAIN_LEAF_TYPES:
+                continue
+            elif isinstance(value, float):
+                if not isfinite(value):
+                    node[key] = 0
+            elif isinstance(value, (dict, list)):
+                stack.append(value)
+    return data
 
 
 def determine_market(stock_code: str) -> str:
@@ -69,7 +138,7 @@ def determine_market(stock_code: str) -> str:
     Returns:
         市场标识 ('sz' 或 'sh')
     """
-    return "sz" if stock_code.startswith(("0", "3")) else "sh"
+    return _MARKET_BY_FIRST_CHAR.get(stock_code[:1], "sh")
 
 
 def format_secid(stock_code: str) -> str:
@@ -82,7 +151,7 @@ def format_secid(stock_code: str) -> str:
     Returns:
         格式化后的secid
     """
-    return f"0.{stock_code}" if stock_code.startswith(("0", "3")) else f"1.{stock_code}"
+    return _SECID_PREFIX_BY_FIRST_CHAR.get(stock_code[:1], "1.") + stock_code
 
 
 def classify_holder_type(holder_name: str) -> str:
@@ -95,18 +164,27 @@ def classify_holder_type(holder_name: str) -> str:
     Returns:
         股东类型
     """
-    if "基金" in holder_name:
-        return "基金"
-    elif "证券" in holder_name or "机构" in holder_name:
-        return "机构"
-    elif "银行" in holder_name:
-        return "银行"
-    elif "保险" in holder_name:
-        return "保险"
-    elif "社保" in holder_name:
-        return "社保"
-    elif "个人" in holder_name:
-        return "个人"
-    else:
-        return "其他"
+    # 一次扫描找出名称中出现的全部关键字，再按规则优先级取最靠前的一条
+    best = min(
+        (_HOLDER_KEYWORD_RANK[keyword] for keyword in _HOLDER_KEYWORD_RE.findall(holder_name)),
+        default=None
+    )
+    return HOLDER_TYPE_RULES[best][1] if best is not None else _HOLDER_TYPE_OTHER
+
+
+def classify_holder_type_series(holder_names: pd.Series) -> List[str]:
+    """
+    批量分类股东类型，规则与 classify_holder_type 一致
+    
+    Args:
+        holder_names: 股东名称序列
+        
+    Returns:
+        股东类型列表，与输入顺序一致
+    """
+    names = holder_names.fillna("").astype(str)
+    conditions = [names.str.contains(pattern, regex=True) for pattern, _ in HOLDER_TYPE_RULES]
+    # 先选出规则序号再查表，返回驻留的类型字符串而不是 numpy 新建的字符串
+    ranks = np.select(conditions, list(range(len(HOLDER_TYPE_RULES))), default=len(HOLDER_TYPE_RULES))
+    return [_HOLDER_TYPE_BY_RANK[rank] for rank in ranks.tolist()]
 
@@ -0,0 +1,37 @@
+"""
+异步限速器
+"""
+
+import asyncio
+import time
+
+
+class AsyncRateLimiter:
+    """按主机限速的异步令牌桶
+
+    每次进入上下文占用一个时间槽，保证平均速率不超过 rate 次/秒。
+    仅在单个事件循环内使用；不同数据源各自持有实例，互不阻塞。
+    """
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._interval = 1.0 / rate if rate > 0 else 0.0
+        # 下一个可用时间槽
+        self._next_slot = 0.0
+
+    async def acquire(self) -> None:
+        """等待直到获得下一个时间槽"""
+        if self._interval <= 0:
+            return
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self._interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return False
@@ -51,7 +51,7 @@ async def test_single_stock_refresh():
     
     try:
         # 连接数据库
-        if not db_manager.connect():
+        if not await db_manager.connect():
             logger.error("❌ 数据库连接失败，跳过单只股票刷新测试")
             return False
         
@@ -105,8 +105,8 @@ async def test_scheduler_lifecycle():
         logger.info("🚀 启动调度器...")
         await scheduler.start()
         
-        # 等待一秒
-        await asyncio.sleep(1)
+        # start() 返回时任务已注册，让出一次事件循环即可
+        await asyncio.sleep(0.05)
         
         # 检查状态
         status = scheduler.get_scheduler_status()
@@ -131,22 +131,23 @@ async def main():
     logger.info(f"⏰ 测试时间: {datetime.now()}")
     logger.info("=" * 60)
     
-    tests = [
+    # 基本功能与生命周期测试不依赖数据库，互相独立，并发执行
+    concurrent_tests = [
         ("调度器基本功能", test_scheduler_basic),
         ("调度器生命周期", test_scheduler_lifecycle),
-        ("单只股票刷新", test_single_stock_refresh),
     ]
+    logger.info(f"\n📋 并发执行测试: {', '.join(name for name, _ in concurrent_tests)}")
+    logger.info("-" * 40)
+    concurrent_results = await asyncio.gather(*(test_func() for _, test_func in concurrent_tests))
+    results = list(zip((name for name, _ in concurrent_tests), concurrent_results, strict=True))
     
-    results = []
+    # 依赖数据库的测试最后执行
+    test_name = "单只股票刷新"
+    logger.info(f"\n📋 执行测试: {test_name}")
+    logger.info("-" * 40)
+    results.append((test_name, await test_single_stock_refresh()))
     
-    for test_name, test_func in tests:
-        logger.info(f"\n📋 执行测试: {test_name}")
-        logger.info("-" * 40)
-        
-        result = await test_func()
-        results.append((test_name, result))
-        
-        logger.info("-" * 40)
+    for test_name, result in results:
         logger.info(f"📊 {test_name} 结果: {'✅ 通过' if result else '❌ 失败'}")
     
     # 汇总结果
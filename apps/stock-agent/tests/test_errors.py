@@ -0,0 +1,46 @@
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+
+_tests_dir = Path(__file__).resolve().parent
+_src_dir = _tests_dir.parent / "src"
+if str(_src_dir) not in sys.path:
+    sys.path.insert(0, str(_src_dir))
+
+from stock.api.errors import handle_errors  # noqa: E402
+
+
+async def test_http_exception_is_reraised_unchanged():
+    original = HTTPException(status_code=404, detail="未找到股票 000001")
+
+    @handle_errors("获取股票 {stock_code} 失败")
+    async def endpoint(stock_code: str):
+        raise original
+
+    with pytest.raises(HTTPException) as exc_info:
+        await endpoint(stock_code="000001")
+
+    assert exc_info.value is original
+
+
+async def test_other_exception_becomes_500_with_formatted_detail():
+    @handle_errors("刷新股票 {stock_code} 失败")
+    async def endpoint(stock_code: str):
+        raise ValueError("连接超时")
+
+    with pytest.raises(HTTPException) as exc_info:
+        await endpoint(stock_code="600036")
+
+    assert exc_info.value.status_code == 500
+    assert exc_info.value.detail == "刷新股票 600036 失败: 连接超时"
+    assert isinstance(exc_info.value.__cause__, ValueError)
+
+
+async def test_successful_call_returns_result():
+    @handle_errors("查询失败")
+    async def endpoint():
+        return {"success": True}
+
+    assert await endpoint() == {"success": True}
@@ -0,0 +1,46 @@
+import asyncio
+import sys
+from pathlib import Path
+
+_tests_dir = Path(__file__).resolve().parent
+_src_dir = _tests_dir.parent / "src"
+if str(_src_dir) not in sys.path:
+    sys.path.insert(0, str(_src_dir))
+
+from stock.api import stock_api  # noqa: E402
+
+
+async def test_concurrent_loads_share_one_call_and_release_lock():
+    stock_api._list_cache.clear()
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return ["000001"]
+
+    results = await asyncio.gather(*(
+        stock_api._get_cached_list("industry:银行", loader) for _ in range(5)
+    ))
+
+    assert calls == 1
+    assert all(result == results[0] for result in results)
+    assert stock_api._list_cache_locks == {}
+    assert stock_api._list_cache_lock_users == {}
+    stock_api._list_cache.clear()
+
+
+async def test_unknown_industry_does_not_leave_lock_behind():
+    stock_api._list_cache.clear()
+
+    async def loader():
+        await asyncio.sleep(0)
+        return []
+
+    await asyncio.gather(*(
+        stock_api._get_cached_list(f"industry:不存在{i % 2}", loader) for i in range(4)
+    ))
+
+    assert stock_api._list_cache_locks == {}
+    assert stock_api._list_cache_lock_users == {}
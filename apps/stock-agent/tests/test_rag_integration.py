@@ -3,300 +3,249 @@ RAG-Analysis 系统集成测试
 """
 
 import asyncio
+import time
+from functools import wraps
 import httpx
-import json
-from typing import Dict, Any
+import orjson
+from typing import Dict, Any, Optional
+
+
+def _guard(**error_fields: Any):
+    """测试方法异常兜底：出错时返回 error_fields 加上错误信息，不中断整个测试套件"""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(self, *args, **kwargs) -> Dict[str, Any]:
+            try:
+                return await func(self, *args, **kwargs)
+            except Exception as e:
+                return {**error_fields, "error": str(e)}
+        return wrapper
+    return decorator
 
 
 class RAGIntegrationTester:
     """RAG 集成测试器"""
     
-    def __init__(self):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
         self.stock_agent_url = "http://localhost:8020"
         self.rag_analysis_url = "http://localhost:8010"
+        # 所有测试共用一个客户端，复用到两个服务的长连接；可由调用方注入（由调用方负责关闭）
+        self._owns_client = client is None
+        self.client = client or httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=32),
+            timeout=10.0
+        )
         
+    @_guard(service="stock-agent", status="error", response=None)
     async def test_stock_agent_health(self) -> Dict[str, Any]:
         """测试 Stock Agent 健康状态"""
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{self.stock_agent_url}/api/v1/stocks/health")
-                return {
-                    "service": "stock-agent",
-                    "status": "healthy" if response.status_code == 200 else "unhealthy",
-                    "response": response.json() if response.status_code == 200 else None,
-                    "error": None
-                }
-        except Exception as e:
-            return {
-                "service": "stock-agent",
-                "status": "error",
-                "response": None,
-                "error": str(e)
-            }
+        response = await self.client.get(f"{self.stock_agent_url}/api/v1/stocks/health")
+        return {
+            "service": "stock-agent",
+            "status": "healthy" if response.status_code == 200 else "unhealthy",
+            "response": response.json() if response.status_code == 200 else None,
+            "error": None
+        }
     
+    @_guard(service="rag-analysis", status="error", response=None)
     async def test_rag_analysis_health(self) -> Dict[str, Any]:
         """测试 RAG Analysis 健康状态"""
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{self.rag_analysis_url}/meta")
-                return {
-                    "service": "rag-analysis",
-                    "status": "healthy" if response.status_code == 200 else "unhealthy",
-                    "response": response.json() if response.status_code == 200 else None,
-                    "error": None
-                }
-        except Exception as e:
-            return {
-                "service": "rag-analysis",
-                "status": "error",
-                "response": None,
-                "error": str(e)
-            }
+        response = await self.client.get(f"{self.rag_analysis_url}/meta")
+        return {
+            "service": "rag-analysis",
+            "status": "healthy" if response.status_code == 200 else "unhealthy",
+            "response": response.json() if response.status_code == 200 else None,
+            "error": None
+        }
     
+    @_guard(test="stock_data_retrieval", status="error")
     async def test_stock_data_retrieval(self) -> Dict[str, Any]:
         """测试股票数据获取"""
-        try:
-            async with httpx.AsyncClient() as client:
-                # 测试获取股票列表
-                response = await client.get(
-                    f"{self.stock_agent_url}/api/v1/stocks/",
-                    params={"industries": ["银行"], "limit": 5}
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    return {
-                        "test": "stock_data_retrieval",
-                        "status": "success",
-                        "data_count": len(data.get("data", [])),
-                        "sample_data": data.get("data", [])[:2] if data.get("data") else None,
-                        "error": None
-                    }
-                else:
-                    return {
-                        "test": "stock_data_retrieval",
-                        "status": "failed",
-                        "error": f"HTTP {response.status_code}"
-                    }
-        except Exception as e:
+        # 测试获取股票列表
+        response = await self.client.get(
+            f"{self.stock_agent_url}/api/v1/stocks/",
+            params={"industries": ["银行"], "limit": 5}
+        )
+        
+        if response.status_code == 200:
+            data = response.json()
             return {
                 "test": "stock_data_retrieval",
-                "status": "error",
-                "error": str(e)
+                "status": "success",
+                "data_count": len(data.get("data", [])),
+                "sample_data": data.get("data", [])[:2] if data.get("data") else None,
+                "error": None
+            }
+        else:
+            return {
+                "test": "stock_data_retrieval",
+                "status": "failed",
+                "error": f"HTTP {response.status_code}"
             }
     
+    @_guard(test="rag_market_context", status="error")
     async def test_rag_market_context(self) -> Dict[str, Any]:
         """测试 RAG 市场上下文接口"""
-        try:
-            async with httpx.AsyncClient() as client:
-                # 测试市场上下文接口
-                payload = {
-                    "symbols": ["000001", "600036"],
-                    "time_horizon": "medium"
-                }
-                
-                response = await client.post(
-                    f"{self.stock_agent_url}/api/v1/rag/market-context",
-                    json=payload
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    return {
-                        "test": "rag_market_context",
-                        "status": "success",
-                        "symbols_count": len(payload["symbols"]),
-                        "data_available": "data" in data and len(data["data"]) > 0,
-                        "error": None
-                    }
-                else:
-                    return {
-                        "test": "rag_market_context",
-                        "status": "failed",
-                        "error": f"HTTP {response.status_code}: {response.text}"
-                    }
-        except Exception as e:
+        # 测试市场上下文接口
+        payload = {
+            "symbols": ["000001", "600036"],
+            "time_horizon": "medium"
+        }
+        
+        response = await self.client.post(
+            f"{self.stock_agent_url}/api/v1/rag/market-context",
+            json=payload
+        )
+        
+        if response.status_code == 200:
+            data = response.json()
             return {
                 "test": "rag_market_context",
-                "status": "error",
-                "error": str(e)
+                "status": "success",
+                "symbols_count": len(payload["symbols"]),
+                "data_available": "data" in data and len(data["data"]) > 0,
+                "error": None
+            }
+        else:
+            return {
+                "test": "rag_market_context",
+                "status": "failed",
+                "error": f"HTTP {response.status_code}: {response.text}"
             }
     
+    @_guard(test="sector_analysis", status="error")
     async def test_sector_analysis(self) -> Dict[str, Any]:
         """测试行业分析接口"""
-        try:
-            async with httpx.AsyncClient() as client:
-                # 测试行业分析接口
-                payload = {
-                    "industry": "银行",
-                    "limit": 10
-                }
-                
-                response = await client.post(
-                    f"{self.stock_agent_url}/api/v1/rag/sector-analysis",
-                    json=payload
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    return {
-                        "test": "sector_analysis",
-                        "status": "success",
-                        "industry": payload["industry"],
-                        "companies_found": data.get("data", {}).get("total_companies", 0),
-                        "error": None
-                    }
-                else:
-                    return {
-                        "test": "sector_analysis",
-                        "status": "failed",
-                        "error": f"HTTP {response.status_code}: {response.text}"
-                    }
-        except Exception as e:
+        # 测试行业分析接口
+        payload = {
+            "industry": "银行",
+            "limit": 10
+        }
+        
+        response = await self.client.post(
+            f"{self.stock_agent_url}/api/v1/rag/sector-analysis",
+            json=payload
+        )
+        
+        if response.status_code == 200:
+            data = response.json()
             return {
                 "test": "sector_analysis",
-                "status": "error",
-                "error": str(e)
+                "status": "success",
+                "industry": payload["industry"],
+                "companies_found": data.get("data", {}).get("total_companies", 0),
+                "error": None
+            }
+        else:
+            return {
+                "test": "sector_analysis",
+                "status": "failed",
+                "error": f"HTTP {response.status_code}: {response.text}"
             }
     
+    @_guard(test="comparative_analysis", status="error")
     async def test_comparative_analysis(self) -> Dict[str, Any]:
         """测试对比分析接口"""
-        try:
-            async with httpx.AsyncClient() as client:
-                # 测试对比分析接口
-                payload = {
-                    "symbols": ["000001", "600036", "000002"]
-                }
-                
-                response = await client.post(
-                    f"{self.stock_agent_url}/api/v1/rag/comparative-analysis",
-                    json=payload
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    return {
-                        "test": "comparative_analysis",
-                        "status": "success",
-                        "symbols_count": len(payload["symbols"]),
-                        "comparison_available": "comparison" in data.get("data", {}),
-                        "ranking_available": "ranking" in data.get("data", {}),
-                        "error": None
-                    }
-                else:
-                    return {
-                        "test": "comparative_analysis",
-                        "status": "failed",
-                        "error": f"HTTP {response.status_code}: {response.text}"
-                    }
-        except Exception as e:
+        # 测试对比分析接口
+        payload = {
+            "symbols": ["000001", "600036", "000002"]
+        }
+        
+        response = await self.client.post(
+            f"{self.stock_agent_url}/api/v1/rag/comparative-analysis",
+            json=payload
+        )
+        
+        if response.status_code == 200:
+            data = response.json()
             return {
                 "test": "comparative_analysis",
-                "status": "error",
-                "error": str(e)
+                "status": "success",
+                "symbols_count": len(payload["symbols"]),
+                "comparison_available": "comparison" in data.get("data", {}),
+                "ranking_available": "ranking" in data.get("data", {}),
+                "error": None
+            }
+        else:
+            return {
+                "test": "comparative_analysis",
+                "status": "failed",
+                "error": f"HTTP {response.status_code}: {response.text}"
             }
     
+    @_guard(test="rag_integration_test", status="error")
     async def test_rag_integration_endpoint(self) -> Dict[str, Any]:
         """测试 RAG 集成测试端点"""
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{self.stock_agent_url}/api/v1/rag/integration/test")
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    return {
-                        "test": "rag_integration_test",
-                        "status": "success",
-                        "integration_status": data.get("data", {}).get("integration_status"),
-                        "all_tests_passed": data.get("success", False),
-                        "error": None
-                    }
-                else:
-                    return {
-                        "test": "rag_integration_test",
-                        "status": "failed",
-                        "error": f"HTTP {response.status_code}: {response.text}"
-                    }
-        except Exception as e:
+        response = await self.client.get(f"{self.stock_agent_url}/api/v1/rag/integration/test")
+        
+        if response.status_code == 200:
+            data = response.json()
+            return {
+                "test": "rag_integration_test",
+                "status": "success",
+                "integration_status": data.get("data", {}).get("integration_status"),
+                "all_tests_passed": data.get("success", False),
+                "error": None
+            }
+        else:
             return {
                 "test": "rag_integration_test",
-                "status": "error",
-                "error": str(e)
+                "status": "failed",
+                "error": f"HTTP {response.status_code}: {response.text}"
             }
     
+    @_guard(workflow="rag_analysis_simulation", overall_status="error")
     async def simulate_rag_workflow(self) -> Dict[str, Any]:
         """模拟 RAG-Analysis 工作流程"""
-        try:
-            workflow_results = {
-                "workflow": "rag_analysis_simulation",
-                "steps": [],
-                "overall_status": "success"
-            }
-            
-            async with httpx.AsyncClient() as client:
-                # 步骤1: 获取市场上下文
-                market_context = await client.post(
-                    f"{self.stock_agent_url}/api/v1/rag/market-context",
-                    json={"symbols": ["000001", "600036"], "time_horizon": "medium"}
-                )
-                
-                step1_result = {
-                    "step": 1,
-                    "name": "market_context_retrieval",
-                    "status": "success" if market_context.status_code == 200 else "failed",
-                    "data_available": market_context.status_code == 200
-                }
-                workflow_results["steps"].append(step1_result)
-                
-                # 步骤2: 获取行业分析
-                sector_analysis = await client.post(
-                    f"{self.stock_agent_url}/api/v1/rag/sector-analysis",
-                    json={"industry": "银行", "limit": 5}
-                )
-                
-                step2_result = {
-                    "step": 2,
-                    "name": "sector_analysis",
-                    "status": "success" if sector_analysis.status_code == 200 else "failed",
-                    "data_available": sector_analysis.status_code == 200
-                }
-                workflow_results["steps"].append(step2_result)
-                
-                # 步骤3: 获取对比分析
-                comparative = await client.post(
-                    f"{self.stock_agent_url}/api/v1/rag/comparative-analysis",
-                    json={"symbols": ["000001", "600036"]}
-                )
-                
-                step3_result = {
-                    "step": 3,
-                    "name": "comparative_analysis",
-                    "status": "success" if comparative.status_code == 200 else "failed",
-                    "data_available": comparative.status_code == 200
-                }
-                workflow_results["steps"].append(step3_result)
-                
-                # 检查整体状态
-                failed_steps = [s for s in workflow_results["steps"] if s["status"] != "success"]
-                if failed_steps:
-                    workflow_results["overall_status"] = "partial_failure"
-                    workflow_results["failed_steps"] = len(failed_steps)
-                
-                return workflow_results
-                
-        except Exception as e:
-            return {
-                "workflow": "rag_analysis_simulation",
-                "overall_status": "error",
-                "error": str(e)
-            }
+        workflow_results = {
+            "workflow": "rag_analysis_simulation",
+            "steps": [],
+            "overall_status": "success"
+        }
+        
+        # 三个步骤互不依赖，并发请求，最后统一检查结果
+        market_context, sector_analysis, comparative = await asyncio.gather(
+            self.client.post(
+                f"{self.stock_agent_url}/api/v1/rag/market-context",
+                json={"symbols": ["000001", "600036"], "time_horizon": "medium"}
+            ),
+            self.client.post(
+                f"{self.stock_agent_url}/api/v1/rag/sector-analysis",
+                json={"industry": "银行", "limit": 5}
+            ),
+            self.client.post(
+                f"{self.stock_agent_url}/api/v1/rag/comparative-analysis",
+                json={"symbols": ["000001", "600036"]}
+            )
+        )
+        
+        steps = (
+            ("market_context_retrieval", market_context),
+            ("sector_analysis", sector_analysis),
+            ("comparative_analysis", comparative)
+        )
+        for step, (name, response) in enumerate(steps, start=1):
+            workflow_results["steps"].append({
+                "step": step,
+                "name": name,
+                "status": "success" if response.status_code == 200 else "failed",
+                "data_available": response.status_code == 200
+            })
+        
+        # 检查整体状态
+        failed_steps = [s for s in workflow_results["steps"] if s["status"] != "success"]
+        if failed_steps:
+            workflow_results["overall_status"] = "partial_failure"
+            workflow_results["failed_steps"] = len(failed_steps)
+        
+        return workflow_results
     
     async def run_full_test_suite(self) -> Dict[str, Any]:
         """运行完整测试套件"""
         print("🚀 开始 RAG-Analysis 与 Stock-Agent 集成测试...")
         
         test_results = {
-            "timestamp": asyncio.get_event_loop().time(),
+            "timestamp": time.time_ns(),
             "tests": []
         }
         
@@ -312,10 +261,15 @@ class RAGIntegrationTester:
             ("RAG 工作流模拟", self.simulate_rag_workflow)
         ]
         
-        # 运行所有测试
-        for test_name, test_func in tests:
-            print(f"  📋 运行测试: {test_name}")
-            result = await test_func()
+        # 各测试互相独立，并发运行
+        print(f"  📋 并发运行 {len(tests)} 项测试")
+        try:
+            results = await asyncio.gather(*(test_func() for _, test_func in tests))
+        finally:
+            if self._owns_client:
+                await self.client.aclose()
+        
+        for (test_name, _), result in zip(tests, results, strict=True):
             result["test_name"] = test_name
             test_results["tests"].append(result)
             
@@ -326,14 +280,19 @@ class RAGIntegrationTester:
                 print(f"      错误: {result['error']}")
         
         # 统计结果
-        successful_tests = [t for t in test_results["tests"] if t.get("status") == "success"]
-        failed_tests = [t for t in test_results["tests"] if t.get("status") in ["failed", "error"]]
+        successful = failed = 0
+        for t in test_results["tests"]:
+            status = t.get("status")
+            if status == "success":
+                successful += 1
+            elif status in ("failed", "error"):
+                failed += 1
         
         test_results["summary"] = {
             "total_tests": len(tests),
-            "successful": len(successful_tests),
-            "failed": len(failed_tests),
-            "success_rate": len(successful_tests) / len(tests) * 100
+            "successful": successful,
+            "failed": failed,
+            "success_rate": successful / len(tests) * 100
         }
         
         print(f"\n📊 测试结果汇总:")
@@ -351,8 +310,8 @@ async def main():
     results = await tester.run_full_test_suite()
     
     # 保存结果到文件
-    with open("rag_integration_test_results.json", "w", encoding="utf-8") as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
+    with open("rag_integration_test_results.json", "wb") as f:
+        f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
     
     print(f"\n💾 测试结果已保存到 rag_integration_test_results.json")
     
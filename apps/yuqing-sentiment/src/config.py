@@ -3,15 +3,16 @@ YuQing舆情分析系统配置
 """
 
 import os
+from functools import lru_cache
 from pathlib import Path
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import BaseModel
 
 # 设置.env文件路径为项目根目录
-# BASE_DIR 会指向 .../ragWithAgent/apps/yuqing-sentiment/src
-# 因此，项目根目录是 BASE_DIR.parent.parent.parent
-# 这样做可以确保无论在哪里运行脚本，都能正确加载.env
-ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+# BASE_DIR 指向 .../apps/yuqing-sentiment（服务目录），ROOT_DIR 为其上一级
+# 路径只解析一次；这样做可以确保无论在哪里运行脚本，都能正确加载.env
+BASE_DIR = Path(__file__).resolve().parent.parent
+ROOT_DIR = BASE_DIR.parent
 
 class DatabaseSettings(BaseModel):
     """数据库配置"""
@@ -44,7 +45,9 @@ class Settings(BaseSettings):
         env_file_encoding='utf-8',
         # 允许从环境变量名称的前缀来匹配配置项
         # 例如, `DATABASE_URL` 会被加载到 `db.url`
-        env_nested_delimiter='__'
+        env_nested_delimiter='__',
+        # .env 中与本服务无关的配置项直接忽略
+        extra='ignore'
     )
 
     db: DatabaseSettings = DatabaseSettings()
@@ -52,8 +55,14 @@ class Settings(BaseSettings):
     chroma: ChromaSettings = ChromaSettings()
     app: AppSettings = AppSettings()
 
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """获取全局配置（单例，首次调用时解析 .env 并校验）"""
+    return Settings()
+
+
 # 创建一个全局可用的配置实例
-settings = Settings()
+settings = get_settings()
 
 # 为了兼容旧代码，仍然保留一些顶层变量
 # 但推荐使用 `settings.db.url` 这种方式访问
@@ -65,5 +74,4 @@ APP_VERSION = settings.app.app_version
 DEBUG = settings.app.debug
 LOG_LEVEL = settings.app.log_level
 API_KEYS_FILE = settings.app.api_keys_file
-BASE_DIR = Path(__file__).resolve().parent.parent # 保持BASE_DIR的原始定义以防其他地方使用
 
@@ -3,11 +3,25 @@ YuQing舆情分析系统入口
 """
 
 import os
+from importlib.util import find_spec
+
 import uvicorn
 
 
 if __name__ == "__main__":
     host = os.getenv("HOST", "127.0.0.1")
     port = int(os.getenv("PORT", "8000"))
+    # 默认按生产方式启动；开发时设置 RELOAD=1 开启热重载
+    reload = os.getenv("RELOAD", "0") == "1"
 
-    uvicorn.run("yuqing.main:app", host=host, port=port, reload=True)
\ No newline at end of file
+    uvicorn.run(
+        "yuqing.main:app",
+        host=host,
+        port=port,
+        reload=reload,
+        # uvicorn[standard] 自带 uvloop/httptools，缺失时（如 Windows 无 uvloop）回退到标准实现
+        loop="uvloop" if find_spec("uvloop") else "asyncio",
+        http="httptools" if find_spec("httptools") else "h11",
+        workers=1 if reload else int(os.getenv("WORKERS", "1")),
+        log_level=os.getenv("LOG_LEVEL", "info").lower(),
+    )
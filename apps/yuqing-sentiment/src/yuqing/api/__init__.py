@@ -2,23 +2,18 @@
 API路由模块
 """
 
-from fastapi import APIRouter
+from importlib import import_module
 
-# 导入各个API模块
-from .news import router as news_router
-from .analysis import router as analysis_router
-from .data_collection import router as data_collection_router
+from fastapi import APIRouter
 
-# 创建API路由器
-api_router = APIRouter()
+# 子路由注册表: (模块名, 路由前缀, 标签)
+_SUB_ROUTERS = (
+    ("news", "/news", ("新闻",)),
+    ("analysis", "/analysis", ("分析",)),
+    ("data_collection", "/data-collection", ("数据采集",)),
+)
 
-# 注册子路由
-api_router.include_router(news_router, prefix="/news", tags=["新闻"])
-api_router.include_router(analysis_router, prefix="/analysis", tags=["分析"])
-api_router.include_router(data_collection_router, prefix="/data-collection", tags=["数据采集"])
 
-# 根路由
-@api_router.get("/")
 async def api_root():
     return {
         "message": "新闻舆情分析API",
@@ -29,3 +24,17 @@ async def api_root():
             "docs": "/docs"
         }
     }
+
+
+def build_api_router() -> APIRouter:
+    """构建聚合API路由器，子路由模块在此处才导入，由应用启动时调用"""
+    router = APIRouter()
+    include = router.include_router
+    for module_name, prefix, tags in _SUB_ROUTERS:
+        sub_router = import_module(f"{__name__}.{module_name}").router
+        include(sub_router, prefix=prefix, tags=list(tags))
+
+    # 根路由
+    router.add_api_route("/", api_root, methods=["GET"])
+    return router
+
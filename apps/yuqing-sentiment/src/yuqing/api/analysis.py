@@ -1,13 +1,18 @@
 """
 分析相关API端点
 """
-from typing import Optional
+import asyncio
+import base64
+import json
+import math
+from typing import Any, List, Optional, Tuple
 from datetime import datetime, timedelta, timezone
 from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
 from sqlalchemy.orm import Session
-from sqlalchemy import select, desc, func
+from sqlalchemy import select, desc, func, tuple_, cast, Integer, Row, text, bindparam
 
 from yuqing.core.database import get_db
+from yuqing.core.cache import cache_manager, get_cache_key
 from yuqing.models.database_models import NewsItem, StockAnalysis
 from yuqing.services.deepseek_service import deepseek_service
 from yuqing.services.hot_news_discovery import hot_news_discovery
@@ -15,87 +20,163 @@ from yuqing.core.logging import app_logger as logger
 
 router = APIRouter()
 
+# 计数缓存：结果集较小时 COUNT 本身很便宜，直接查询以保证准确
+_COUNT_CACHE_TTL = 30
+_COUNT_CACHE_THRESHOLD = 1000
+
+# 热点/热词类全局只读接口的响应缓存时间（秒），generated_at 随响应一起缓存
+_RESPONSE_CACHE_TTL = 90
+
+# 分析列表响应用到的列（两表的 id 列加标签区分）
+_ANALYSIS_LIST_COLUMNS = (
+    StockAnalysis.id.label("analysis_id"),
+    StockAnalysis.sentiment_label,
+    StockAnalysis.confidence_score,
+    StockAnalysis.market_impact_level,
+    StockAnalysis.analysis_result,
+    StockAnalysis.analysis_timestamp,
+    NewsItem.id.label("news_id"),
+    NewsItem.title,
+    NewsItem.source,
+    NewsItem.published_at,
+    NewsItem.collected_at,
+)
+
+# 热门关键词：展开 analysis_result 的 keywords 数组后分组计数（两种数据库的 JSON 展开函数不同）
+_TRENDING_KEYWORDS_SQL = {
+    "postgresql": """
+        SELECT kw AS keyword, COUNT(*) AS n, COUNT(*) OVER () AS unique_total
+        FROM {table} AS a
+        CROSS JOIN LATERAL jsonb_array_elements_text(
+            CASE WHEN jsonb_typeof(CAST(a.analysis_result AS jsonb) -> 'keywords') = 'array'
+                 THEN CAST(a.analysis_result AS jsonb) -> 'keywords' END
+        ) AS kw
+        WHERE a.analysis_timestamp >= :cutoff
+        GROUP BY kw
+        ORDER BY n DESC, keyword
+        LIMIT :limit
+    """,
+    "sqlite": """
+        SELECT kw.value AS keyword, COUNT(*) AS n, COUNT(*) OVER () AS unique_total
+        FROM {table} AS a, json_each(a.analysis_result, '$.keywords') AS kw
+        WHERE a.analysis_timestamp >= :cutoff
+          AND json_type(a.analysis_result, '$.keywords') = 'array'
+        GROUP BY kw.value
+        ORDER BY n DESC, keyword
+        LIMIT :limit
+    """,
+}
+
+
+def _encode_cursor(analysis_timestamp: datetime, analysis_id: int) -> str:
+    """将一页最后一条记录的排序键编码为不透明游标"""
+    payload = json.dumps({"ts": analysis_timestamp.isoformat(), "id": analysis_id})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """解析游标，返回 (analysis_timestamp, id)"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(payload["ts"]), int(payload["id"])
+    except Exception as e:
+        raise HTTPException(status_code=400, detail="无效的分页游标") from e
+
+
+async def _fetch_all(db: Session, statement: Any, params: Optional[dict] = None) -> List[Row]:
+    """在线程池中执行查询并取回全部行（Session 基于同步驱动，直接调用会阻塞事件循环）"""
+    return await asyncio.to_thread(lambda: db.execute(statement, params).all())
+
+
+async def _cached_count(cache_key: str, count_query, db: Session) -> int:
+    """执行 COUNT 查询，结果较大时按过滤条件缓存一小段时间"""
+    cached = await cache_manager.get(cache_key)
+    if cached is not None:
+        return cached
+
+    total = (await _fetch_all(db, count_query))[0][0] or 0
+    if total >= _COUNT_CACHE_THRESHOLD:
+        await cache_manager.set(cache_key, total, expire=_COUNT_CACHE_TTL)
+    return total
+
 
 @router.get("/", summary="获取分析列表")
 async def get_analysis_list(
-    page: int = Query(1, ge=1, description="页码"),
+    cursor: Optional[str] = Query(None, description="分页游标(取自上一页的 next_cursor)"),
     limit: int = Query(20, ge=1, le=100, description="每页数量"),
     sentiment: Optional[str] = Query(None, description="情感过滤"),
     impact: Optional[str] = Query(None, description="影响级别过滤"),
     hours: Optional[int] = Query(24, description="时间范围(小时)"),
     db: Session = Depends(get_db)
 ):
-    """获取分析结果列表"""
+    """获取分析结果列表（按分析时间倒序的游标分页）"""
+    after = _decode_cursor(cursor) if cursor else None
     try:
-        # 构建查询
-        query = select(StockAnalysis, NewsItem).join(
-            NewsItem, StockAnalysis.news_id == NewsItem.id
-        )
-
+        # 过滤条件（列表查询与计数共用）
+        filters = []
         # 时间过滤
         if hours:
             cutoff_time = datetime.now(timezone.utc) - timedelta(hours=hours)
-            query = query.where(
-                StockAnalysis.analysis_timestamp >= cutoff_time)
-
+            filters.append(StockAnalysis.analysis_timestamp >= cutoff_time)
         # 情感过滤
         if sentiment:
-            query = query.where(StockAnalysis.sentiment_label == sentiment)
-
+            filters.append(StockAnalysis.sentiment_label == sentiment)
         # 影响级别过滤
         if impact:
-            query = query.where(StockAnalysis.market_impact_level == impact)
+            filters.append(StockAnalysis.market_impact_level == impact)
+
+        # 构建查询（只取响应用到的列，返回轻量 Row 而不实例化 ORM 对象）
+        query = select(*_ANALYSIS_LIST_COLUMNS).join(
+            NewsItem, StockAnalysis.news_id == NewsItem.id
+        ).where(*filters)
 
-        # 排序和分页
-        query = query.order_by(desc(StockAnalysis.analysis_timestamp))
-        offset = (page - 1) * limit
-        query = query.offset(offset).limit(limit)
+        # 游标分页：从上一页最后一条之后继续取，避免 OFFSET 逐行扫描丢弃
+        if after:
+            query = query.where(
+                tuple_(StockAnalysis.analysis_timestamp, StockAnalysis.id) < tuple_(*after))
 
-        result = db.execute(query)
-        analysis_items = result.all()
+        # 排序（id 作为同一时间戳的次序）
+        query = query.order_by(
+            desc(StockAnalysis.analysis_timestamp), desc(StockAnalysis.id)).limit(limit)
 
-        # 获取总数
-        count_query = select(func.count(StockAnalysis.id))
-        if hours:
-            cutoff_time = datetime.now(timezone.utc) - timedelta(hours=hours)
-            count_query = count_query.where(
-                StockAnalysis.analysis_timestamp >= cutoff_time)
-        if sentiment:
-            count_query = count_query.where(
-                StockAnalysis.sentiment_label == sentiment)
-        if impact:
-            count_query = count_query.where(
-                StockAnalysis.market_impact_level == impact)
+        rows = await _fetch_all(db, query)
 
-        total_result = db.execute(count_query)
-        total = total_result.scalar()
+        # 获取总数（与游标无关，各页共用同一份缓存）
+        total = await _cached_count(
+            get_cache_key("analysis:count", hours, sentiment, impact),
+            select(func.count(StockAnalysis.id)).where(*filters),
+            db
+        )
 
         return {
             "data": [
                 {
                     "analysis": {
-                        "id": analysis.id,
-                        "sentiment_label": analysis.sentiment_label,
-                        "confidence_score": analysis.confidence_score,
-                        "market_impact_level": analysis.market_impact_level,
-                        "analysis_result": analysis.analysis_result,
-                        "analysis_timestamp": analysis.analysis_timestamp
+                        "id": row.analysis_id,
+                        "sentiment_label": row.sentiment_label,
+                        "confidence_score": row.confidence_score,
+                        "market_impact_level": row.market_impact_level,
+                        "analysis_result": row.analysis_result,
+                        "analysis_timestamp": row.analysis_timestamp
                     },
                     "news": {
-                        "id": news.id,
-                        "title": news.title,
-                        "source": news.source,
-                        "published_at": news.published_at,
-                        "collected_at": news.collected_at
+                        "id": row.news_id,
+                        "title": row.title,
+                        "source": row.source,
+                        "published_at": row.published_at,
+                        "collected_at": row.collected_at
                     }
                 }
-                for analysis, news in analysis_items
+                for row in rows
             ],
             "pagination": {
-                "page": page,
                 "limit": limit,
                 "total": total,
-                "pages": (total + limit - 1) // limit
+                "pages": (total + limit - 1) // limit,
+                # 不足一页说明已到末尾
+                "next_cursor": _encode_cursor(
+                    rows[-1].analysis_timestamp, rows[-1].analysis_id
+                ) if len(rows) == limit else None
             }
         }
 
@@ -113,41 +194,56 @@ async def get_sentiment_stats(
     try:
         cutoff_time = datetime.now(timezone.utc) - timedelta(hours=hours)
 
-        query = select(StockAnalysis).where(
-            StockAnalysis.analysis_timestamp >= cutoff_time
-        )
-        result = db.execute(query)
-        analyses = result.scalars().all()
+        in_window = StockAnalysis.analysis_timestamp >= cutoff_time
 
-        # 统计情感分布
+        # 情感分布（含未标注的分组，用于统计总数）
         sentiment_counts = {"positive": 0, "negative": 0, "neutral": 0}
+        total_analyses = 0
+        sentiment_rows = await _fetch_all(
+            db,
+            select(StockAnalysis.sentiment_label, func.count())
+            .where(in_window)
+            .group_by(StockAnalysis.sentiment_label)
+        )
+        for label, n in sentiment_rows:
+            total_analyses += n
+            if label:
+                sentiment_counts[label] = sentiment_counts.get(label, 0) + n
+
+        # 影响级别分布
         impact_counts = {"high": 0, "medium": 0, "low": 0}
-        confidence_scores = []
-
-        for analysis in analyses:
-            if analysis.sentiment_label:
-                sentiment_counts[analysis.sentiment_label] = sentiment_counts.get(
-                    analysis.sentiment_label, 0) + 1
-            if analysis.market_impact_level:
-                impact_counts[analysis.market_impact_level] = impact_counts.get(
-                    analysis.market_impact_level, 0) + 1
-            if analysis.confidence_score:
-                confidence_scores.append(analysis.confidence_score)
-
-        # 计算置信度统计
-        avg_confidence = sum(confidence_scores) / \
-            len(confidence_scores) if confidence_scores else 0
+        impact_rows = await _fetch_all(
+            db,
+            select(StockAnalysis.market_impact_level, func.count())
+            .where(in_window, StockAnalysis.market_impact_level.isnot(None))
+            .group_by(StockAnalysis.market_impact_level)
+        )
+        for level, n in impact_rows:
+            if level:
+                impact_counts[level] = impact_counts.get(level, 0) + n
+
+        # 置信度统计（空值与 0 不计入）
+        confidence_rows = await _fetch_all(
+            db,
+            select(
+                func.avg(StockAnalysis.confidence_score),
+                func.min(StockAnalysis.confidence_score),
+                func.max(StockAnalysis.confidence_score),
+                func.count(StockAnalysis.confidence_score)
+            ).where(in_window, StockAnalysis.confidence_score != 0)
+        )
+        avg_confidence, min_confidence, max_confidence, confidence_count = confidence_rows[0]
 
         return {
             "timeframe_hours": hours,
-            "total_analyses": len(analyses),
+            "total_analyses": total_analyses,
             "sentiment_distribution": sentiment_counts,
             "impact_distribution": impact_counts,
             "confidence_stats": {
-                "average": round(avg_confidence, 3),
-                "min": min(confidence_scores) if confidence_scores else 0,
-                "max": max(confidence_scores) if confidence_scores else 0,
-                "count": len(confidence_scores)
+                "average": round(float(avg_confidence or 0), 3),
+                "min": min_confidence or 0,
+                "max": max_confidence or 0,
+                "count": confidence_count
             },
             "generated_at": datetime.now(timezone.utc)
         }
@@ -160,47 +256,51 @@ async def get_sentiment_stats(
 @router.get("/stats/timeline", summary="获取时间线统计")
 async def get_timeline_stats(
     hours: int = Query(24, description="统计时间范围(小时)"),
-    interval: int = Query(1, description="统计间隔(小时)"),
+    interval: int = Query(1, ge=1, description="统计间隔(小时)"),
     db: Session = Depends(get_db)
 ):
     """获取分析结果的时间线统计"""
     try:
         cutoff_time = datetime.now(timezone.utc) - timedelta(hours=hours)
-
-        query = select(StockAnalysis).where(
+        step = interval * 3600
+
+        # 在数据库内按时间段分组计数：段序号 = (时间戳 - 起点) 秒数 // 间隔秒数
+        seconds = func.extract("epoch", StockAnalysis.analysis_timestamp) - cutoff_time.timestamp()
+        if db.get_bind().dialect.name != "sqlite":
+            # PostgreSQL 的 EXTRACT 返回小数，先取整；SQLite 的 strftime('%s') 本身为整数
+            seconds = func.floor(seconds)
+        bucket = (cast(seconds, Integer) // step).label("bucket")
+
+        query = select(
+            bucket, StockAnalysis.sentiment_label, func.count().label("n")
+        ).where(
             StockAnalysis.analysis_timestamp >= cutoff_time
-        ).order_by(StockAnalysis.analysis_timestamp)
+        ).group_by(bucket, StockAnalysis.sentiment_label)
 
-        result = db.execute(query)
-        analyses = result.scalars().all()
+        rows = await _fetch_all(db, query)
 
-        # 按时间间隔分组
-        timeline_data = []
-        current_time = cutoff_time
+        # 按时间间隔生成各时间段（含末尾不足一个间隔的时间段）
         end_time = datetime.now(timezone.utc)
-
-        while current_time < end_time:
-            next_time = current_time + timedelta(hours=interval)
-
-            # 筛选该时间段内的分析
-            period_analyses = [
-                a for a in analyses
-                if current_time <= a.analysis_timestamp < next_time
-            ]
-
-            # 统计该时间段的情感分布
-            sentiment_counts = {"positive": 0, "negative": 0, "neutral": 0}
-            for analysis in period_analyses:
-                if analysis.sentiment_label:
-                    sentiment_counts[analysis.sentiment_label] += 1
-
-            timeline_data.append({
-                "timestamp": current_time,
-                "count": len(period_analyses),
-                "sentiment_distribution": sentiment_counts
-            })
-
-            current_time = next_time
+        bucket_count = math.ceil((end_time - cutoff_time).total_seconds() / step)
+        timeline_data = [
+            {
+                "timestamp": cutoff_time + timedelta(hours=interval * i),
+                "count": 0,
+                "sentiment_distribution": {"positive": 0, "negative": 0, "neutral": 0}
+            }
+            for i in range(bucket_count)
+        ]
+
+        # 将分组结果填入对应时间段
+        for row in rows:
+            if not 0 <= row.bucket < bucket_count:
+                continue
+            period = timeline_data[row.bucket]
+            period["count"] += row.n
+            if row.sentiment_label:
+                sentiment_counts = period["sentiment_distribution"]
+                sentiment_counts[row.sentiment_label] = sentiment_counts.get(
+                    row.sentiment_label, 0) + row.n
 
         return {
             "timeframe_hours": hours,
@@ -253,44 +353,37 @@ async def _background_analyze_recent_news(hours: int, limit: int):
 @router.get("/keywords/trending", summary="获取热门关键词")
 async def get_trending_keywords(
     hours: int = Query(24, description="统计时间范围(小时)"),
-    limit: int = Query(20, description="返回数量"),
+    limit: int = Query(20, ge=1, description="返回数量"),
     db: Session = Depends(get_db)
 ):
     """获取热门关键词统计"""
     try:
+        cache_key = get_cache_key("analysis:keywords", hours, limit)
+        cached = await cache_manager.get(cache_key)
+        if cached is not None:
+            return cached
+
         cutoff_time = datetime.now(timezone.utc) - timedelta(hours=hours)
 
-        query = select(StockAnalysis).where(
-            StockAnalysis.analysis_timestamp >= cutoff_time
+        # 在数据库内展开 analysis_result['keywords'] 并计数，只取回前 limit 条
+        keyword_sql = _TRENDING_KEYWORDS_SQL[db.get_bind().dialect.name]
+        query = text(keyword_sql.format(table=StockAnalysis.__tablename__)).bindparams(
+            bindparam("cutoff", type_=StockAnalysis.analysis_timestamp.type)
         )
-        result = db.execute(query)
-        analyses = result.scalars().all()
-
-        # 提取和统计关键词
-        keyword_counts = {}
-        for analysis in analyses:
-            if analysis.analysis_result and 'keywords' in analysis.analysis_result:
-                keywords = analysis.analysis_result.get('keywords', [])
-                for keyword in keywords:
-                    keyword_counts[keyword] = keyword_counts.get(
-                        keyword, 0) + 1
-
-        # 按频次排序
-        trending_keywords = sorted(
-            keyword_counts.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:limit]
+        trending_keywords = await _fetch_all(db, query, {"cutoff": cutoff_time, "limit": limit})
 
-        return {
+        response = {
             "timeframe_hours": hours,
             "trending_keywords": [
-                {"keyword": keyword, "count": count}
-                for keyword, count in trending_keywords
+                {"keyword": row.keyword, "count": row.n}
+                for row in trending_keywords
             ],
-            "total_unique_keywords": len(keyword_counts),
+            # 窗口函数在分组后计数，即去重关键词总数
+            "total_unique_keywords": trending_keywords[0].unique_total if trending_keywords else 0,
             "generated_at": datetime.now(timezone.utc)
         }
+        await cache_manager.set(cache_key, response, expire=_RESPONSE_CACHE_TTL)
+        return response
 
     except Exception as e:
         logger.error(f"获取热门关键词失败: {e}")
@@ -304,12 +397,17 @@ async def discover_hot_news(
 ):
     """智能发现实时热点新闻"""
     try:
+        cache_key = get_cache_key("analysis:hotspots", hours, limit)
+        cached = await cache_manager.get(cache_key)
+        if cached is not None:
+            return cached
+
         hot_news = await hot_news_discovery.discover_hot_news(hours_back=hours)
 
         # 限制返回数量
         hot_news = hot_news[:limit]
 
-        return {
+        response = {
             "timeframe_hours": hours,
             "total_hotspots": len(hot_news),
             "hotspots": [
@@ -326,6 +424,8 @@ async def discover_hot_news(
             ],
             "generated_at": datetime.now(timezone.utc)
         }
+        await cache_manager.set(cache_key, response, expire=_RESPONSE_CACHE_TTL)
+        return response
 
     except Exception as e:
         logger.error(f"智能热点发现失败: {e}")
@@ -338,14 +438,21 @@ async def get_dynamic_trending_keywords(
 ):
     """获取基于热点发现的动态趋势关键词"""
     try:
+        cache_key = get_cache_key("analysis:trending_dynamic", limit)
+        cached = await cache_manager.get(cache_key)
+        if cached is not None:
+            return cached
+
         trending = await hot_news_discovery.get_trending_keywords_dynamic(limit=limit)
 
-        return {
+        response = {
             "trending_keywords": trending,
             "algorithm": "dynamic_discovery",
             "total_keywords": len(trending),
             "generated_at": datetime.now(timezone.utc)
         }
+        await cache_manager.set(cache_key, response, expire=_RESPONSE_CACHE_TTL)
+        return response
 
     except Exception as e:
         logger.error(f"获取动态趋势关键词失败: {e}")
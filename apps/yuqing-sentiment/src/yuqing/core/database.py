@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, MetaData, text
+from sqlalchemy import create_engine, MetaData, Index, text
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import QueuePool
 from yuqing.core.config import settings
@@ -6,13 +6,20 @@ from yuqing.core.logging import app_logger
 from pathlib import Path
 
 # 导入所有模型以确保表创建
-from yuqing.models.database_models import Base
+from yuqing.models.database_models import Base, StockAnalysis
 
 # 延迟初始化的引擎与会话工厂，支持失败时回退到SQLite
 engine = None
 SessionLocal = None
 metadata = MetaData()
 
+# 分析列表游标分页的排序索引：(analysis_timestamp DESC, id DESC)
+_analysis_timeline_index = Index(
+    "ix_stock_analysis_timestamp_id",
+    StockAnalysis.__table__.c.analysis_timestamp.desc(),
+    StockAnalysis.__table__.c.id.desc(),
+)
+
 
 def _create_engine(db_url: str):
     return create_engine(
@@ -83,6 +90,7 @@ def init_db():
     try:
         Base.metadata.create_all(bind=engine)
         _ensure_minimal_schema_compat()
+        _ensure_query_indexes()
         app_logger.info("数据库表创建成功")
     except Exception as e:
         app_logger.error(f"数据库初始化失败: {e}")
@@ -120,6 +128,14 @@ def check_db_connection():
             return False
 
 
+def _ensure_query_indexes() -> None:
+    """为已存在的表补充查询索引（create_all 只在建表时创建索引）"""
+    try:
+        _analysis_timeline_index.create(bind=engine, checkfirst=True)  # type: ignore
+    except Exception as e:
+        app_logger.warning(f"补充查询索引失败: {e}")
+
+
 def _ensure_minimal_schema_compat() -> None:
     """最小化的表结构兼容处理（主要用于本地/旧SQLite库）。
 
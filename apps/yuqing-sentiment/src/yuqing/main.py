@@ -22,7 +22,7 @@ from yuqing.core import (
     check_redis_connection,
     check_chroma_connection,
 )
-from yuqing.api import api_router
+from yuqing.api import build_api_router
 
 
 @asynccontextmanager
@@ -128,6 +128,7 @@ async def health_check():
 
 
 # 注册API路由
+api_router = build_api_router()
 app.include_router(api_router, prefix="/api")
 # 提供版本化路径别名 /api/v1/*
 app.include_router(api_router, prefix="/api/v1")
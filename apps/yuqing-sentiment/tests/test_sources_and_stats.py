@@ -158,6 +158,44 @@ def test_comprehensive_and_analysis_stats(client: TestClient) -> None:
     assert r4.status_code == 200
 
 
+def test_analysis_list_cursor_pagination(client: TestClient) -> None:
+    db = next(get_db())
+    try:
+        import uuid
+        uid = uuid.uuid4().hex[:8]
+        n = NewsItem(
+            title=f"分页-分析新闻-{uid}",
+            source="test_source",
+            url=f"https://example.com/cursor-1-{uid}",
+            content="游标分页测试内容",
+            collected_at=datetime.now(timezone.utc),
+        )
+        db.add(n)
+        db.commit()
+        db.refresh(n)
+        for _ in range(3):
+            db.add(StockAnalysis(news_id=n.id, sentiment_label="neutral", confidence_score=0.5))
+        db.commit()
+    finally:
+        db.close()
+
+    r1 = client.get("/api/analysis", params={"limit": 2})
+    assert r1.status_code == 200
+    p1 = r1.json()
+    assert len(p1["data"]) == 2
+    cursor = p1["pagination"]["next_cursor"]
+    assert cursor
+
+    r2 = client.get("/api/analysis", params={"limit": 2, "cursor": cursor})
+    assert r2.status_code == 200
+    p2 = r2.json()
+    first_ids = {row["analysis"]["id"] for row in p1["data"]}
+    assert p2["data"] and all(row["analysis"]["id"] not in first_ids for row in p2["data"])
+
+    bad = client.get("/api/analysis", params={"cursor": "not-a-cursor"})
+    assert bad.status_code == 400
+
+
 def test_data_status_endpoint(client: TestClient) -> None:
     resp = client.get("/api/data/status")
     assert resp.status_code == 200